@@ -8,24 +8,34 @@ Secure deployment workflow:
 4. Handles Gmail credentials.json securely via Azure Storage mount
 5. Assigns managed identity + RBAC roles
 
-Usage: python deploy.py
+Usage: python deploy.py [--yes]
+
+Pass --yes (or set PAPERCO_NONINTERACTIVE=1) to skip the "press Enter" pauses
+and reuse the credentials already saved in `.env` and `cred/`.
 """
 
+import configparser
+import hashlib
+import json
 import os
+import shlex
+import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from loguru import logger
 
-from scripts.airtable_setup import airtable_setup_flow
-from scripts.slack_setup import slack_setup_flow
-
 
 REPO_ROOT = Path(__file__).resolve().parent  # Base repo path
 AZURE_INFRA_DIR = REPO_ROOT / "infra" / "azure"  # Terraform lives here
 GCP_INFRA_DIR = REPO_ROOT / "infra" / "gcp"  # GCP Terraform lives here
 CREDENTIALS_FILE = REPO_ROOT / "cred" / "credentials.json"  # Gmail OAuth credentials (local only)
 TOKEN_FILE = REPO_ROOT / "cred" / "token.json"  # Gmail refresh token (must exist before deployment)
+TF_OUTPUTS_CACHE_NAME = ".tfoutputs.cache.json"  # Local cache of `terraform output -json`
+TF_PLUGIN_CACHE_DIR = Path.home() / ".terraform.d" / "plugin-cache"  # Providers shared by azure + gcp
+SECRETS_DIGEST_FILE = Path.home() / ".config" / "paperco" / "secrets.sha256.json"  # Last secrets set per app
 
 
 # Non-sensitive configuration (safe to pass as env vars):
@@ -49,6 +59,13 @@ SENSITIVE_SECRET_KEYS = [
     "GMAIL_TOKEN_JSON",  # OAuth refresh token (generated locally before deployment)
 ]
 
+# Container Apps expects secret names kebab-cased (e.g. SLACK_BOT_TOKEN -> slack-bot-token)
+SECRET_NAME_MAP = {key: key.lower().replace("_", "-") for key in SENSITIVE_SECRET_KEYS}
+
+# Secret names and flags whose values must never be logged
+REDACTED_ARG_NAMES = set(SECRET_NAME_MAP.values())
+REDACTED_FLAGS = {"--logs-workspace-key"}
+
 # Map Terraform output names to keys:
 TERRAFORM_OUTPUT_KEYS = {
     "location": "LOCATION",  # Azure region slug
@@ -91,6 +108,20 @@ ROLE_ASSIGNMENTS = [
     ("AcrPull", "ACR_RESOURCE_ID", "Container Registry"),
 ]
 
+# Helper function to hide secret values before a command is logged
+def redact_command(command: list[str]) -> list[str]:
+    """Return a copy of command with `secret-name=value` and secret flag values masked."""
+    redacted = []
+    for index, arg in enumerate(command):
+        name, sep, _ = arg.partition("=")
+        if sep and name in REDACTED_ARG_NAMES:
+            arg = f"{name}=***"
+        elif index > 0 and command[index - 1] in REDACTED_FLAGS:
+            arg = "***"
+        redacted.append(arg)
+    return redacted
+
+
 # Helper function to run shell commands with logging
 def run_command(
         command: list[str],
@@ -105,13 +136,96 @@ def run_command(
     Returns:
         str: Captured stdout if requested, else empty string.
     """
-    logger.info(f"$ {' '.join(command)}")
+    # lazy=True: the quoted command line is only built if the INFO level is enabled
+    logger.opt(lazy=True).info("$ {}", lambda: shlex.join(redact_command(command)))
     result = subprocess.run(command, cwd=working_dir, check=True,
                             text=True, capture_output=capture_output)
     
     return result.stdout.strip() if capture_output else ""
 
 
+# Helper function to build the `terraform init` command
+def terraform_init_command() -> list[str]:
+    """Return `terraform init`, adding -upgrade only when PAPERCO_UPGRADE_PROVIDERS is set.
+    Without -upgrade, init reuses the providers pinned in .terraform.lock.hcl."""
+    upgrade = ["-upgrade"] if os.getenv("PAPERCO_UPGRADE_PROVIDERS") else []
+    return ["terraform", "init", *upgrade]
+
+
+# Helper function to read Terraform outputs, reusing a local cache while the state is unchanged
+def read_terraform_outputs(infra_dir: Path) -> dict:
+    """Return `terraform output -json` for infra_dir, cached by the state lineage + serial.
+
+    Terraform bumps the state `serial` on every apply that changes something,
+    and a fresh state (after destroy or a new workspace) gets a new `lineage`,
+    so a matching pair means the cached outputs are still current.
+    """
+    state_file = infra_dir / "terraform.tfstate"
+    cache_file = infra_dir / TF_OUTPUTS_CACHE_NAME
+    state = json.loads(state_file.read_text()) if state_file.exists() else {}
+    state_key = [state.get("lineage"), state.get("serial")]
+    cacheable = None not in state_key
+
+    if cacheable and cache_file.exists():
+        cached = json.loads(cache_file.read_text())
+        if cached.get("state_key") == state_key:
+            logger.info(f"Terraform state unchanged (serial {state_key[1]}), using cached outputs")
+            return cached["outputs"]
+
+    # One `terraform output -json` call reads the state once, instead of one CLI run per key
+    outputs = json.loads(run_command(["terraform", "output", "-json"], infra_dir, capture_output=True))
+    if cacheable:
+        cache_file.write_text(json.dumps({"state_key": state_key, "outputs": outputs}))
+        cache_file.chmod(0o600)  # Outputs include secrets, same as the state file itself
+    return outputs
+
+
+# Helper function to turn a `terraform output -json` value into its env/secret string
+def format_terraform_output(value: object) -> str:
+    """Strings stay as-is; booleans, numbers and collections are JSON-encoded
+    (`true`, `3`, `["a"]`), matching what `terraform output` prints for them."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+# Helper function to decide whether the deploy may pause for human input
+def is_interactive() -> bool:
+    """Return False for --yes, PAPERCO_NONINTERACTIVE=1, or when stdin is not a terminal."""
+    return (
+        sys.stdin.isatty()
+        and "--yes" not in sys.argv[1:]
+        and not os.getenv("PAPERCO_NONINTERACTIVE")
+    )
+
+
+# Helper function to tell whether the Container App already holds these exact secrets
+def secrets_unchanged(app_key: str, digest: str, app_name: str, resource_group: str,
+                      secret_names: list[str]) -> bool:
+    """True if `digest` matches the last one stored for app_key and every secret name
+    still exists on the app (secret values themselves can't be read back from Azure)."""
+    if not SECRETS_DIGEST_FILE.exists():
+        return False
+    if json.loads(SECRETS_DIGEST_FILE.read_text()).get(app_key) != digest:
+        return False
+
+    existing = run_command([
+        "az", "containerapp", "secret", "list",
+        "--name", app_name,
+        "--resource-group", resource_group,
+        "--query", "[].name", "-o", "tsv",
+    ], capture_output=True).splitlines()
+    return set(secret_names) <= set(existing)
+
+
+# Helper function to remember which secrets were last set for an app
+def save_secrets_digest(app_key: str, digest: str) -> None:
+    """Store the secrets digest for app_key in SECRETS_DIGEST_FILE (owner-only file)."""
+    SECRETS_DIGEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+    digests = json.loads(SECRETS_DIGEST_FILE.read_text()) if SECRETS_DIGEST_FILE.exists() else {}
+    digests[app_key] = digest
+    SECRETS_DIGEST_FILE.write_text(json.dumps(digests))
+    SECRETS_DIGEST_FILE.chmod(0o600)
+
+
 # Helper function to log each step's header
 def log_step(num: int, title: str) -> None:
     """Print formatted step header."""
@@ -127,36 +241,26 @@ def check_prerequisites() -> tuple[str, str, str]:
     
     # --- 1. Check for required CLIs ---
     for cli in ["az", "terraform", "gcloud", "gh"]:
-        result = subprocess.run(
-            f"command -v {cli}",
-            shell=True,
-            capture_output=True)
-        
-        if result.returncode != 0:
+        if shutil.which(cli) is None:  # PATH lookup in Python, no shell spawned
             logger.error(f"{cli} CLI not installed! Please install it first.")
             if cli == "gh":
                 logger.info("Install GitHub CLI: https://cli.github.com/")
             sys.exit(1)
     
-    # --- 2. Check Azure login and grab subscription ID (for TF var) ---
-    az_subscription_id = subprocess.run([
+    # --- 2. Check Azure login, grab subscription ID (for TF var) and account
+    #        username (the admin user email) with one JMESPath query ---
+    az_account = subprocess.run([
         "az", "account", "show",
-        "--query", "id", "-o", "tsv"
-        ], capture_output=True, text=True)
-    
-    # --- 3. Get Azure account username (which should be the admin user email) ---
-    az_email = subprocess.run([
-        "az", "account", "show", 
-        "--query", "user.name", "-o", "tsv"
+        "--query", "[id, user.name]", "-o", "tsv"
         ], capture_output=True, text=True)
 
-    if az_subscription_id.returncode != 0 or az_email.returncode != 0:
+    if az_account.returncode != 0:
         logger.error(
         "Run 'az login' first and select the right subscription on Azure with admin rights..."
         )
         sys.exit(1)
 
-    # --- 3b. Ensure the Container Apps CLI extension is present (needed for --registry-identity) ---
+    # --- 3. Ensure the Container Apps CLI extension is present (needed for --registry-identity) ---
     try:
         logger.info("Ensuring Azure CLI containerapp extension is installed/up-to-date...")
         subprocess.run(
@@ -172,9 +276,8 @@ def check_prerequisites() -> tuple[str, str, str]:
                      "for Azure CLI: {exc.stderr or exc}")
         sys.exit(1)
     
-    # Store values to pass as Terraform variables
-    subscription_id_value = az_subscription_id.stdout.strip()
-    admin_email_value = az_email.stdout.strip()
+    # Store values to pass as Terraform variables (tsv prints one value per line)
+    subscription_id_value, admin_email_value = az_account.stdout.strip().splitlines()
     
     logger.info(
         f"Retrieved subscription_id={subscription_id_value} "
@@ -214,15 +317,80 @@ def check_prerequisites() -> tuple[str, str, str]:
     return subscription_id_value, admin_email_value, github_token_value
 
 
-# GitHub repo detection using `git remote` in github cli:
+# Helper function to grant one RBAC role to the managed identity (thread-safe)
+def assign_role(principal_id: str, role_name: str, rbac_scope: str, service_description: str) -> None:
+    """Create a role assignment, treating "already exists" conflicts as success."""
+    try:
+        run_command([
+            "az", "role", "assignment", "create",
+            "--assignee-object-id", principal_id,
+            "--assignee-principal-type", "ServicePrincipal",
+            "--role", role_name,
+            "--scope", rbac_scope,
+        ], capture_output=True)  # capture so stderr is available and parallel output stays clean
+    except subprocess.CalledProcessError as exc:
+        # Allow idempotent "already exists" conflicts, fail fast otherwise.
+        err_text = getattr(exc, "stderr", "") or ""
+
+        if "RoleAssignmentExists" in err_text or "already exists" in err_text:
+            logger.warning(f"{role_name} already assigned for {service_description}.")
+        else:
+            logger.error(f"Failed to assign {role_name} for {service_description}: {err_text}")
+            raise
+
+
+# Helper function to list every role assignment of the managed identity in one call
+def list_assigned_roles(principal_id: str) -> set[tuple[str, str]]:
+    """Return the principal's role assignments as (role name, lowercased scope) pairs."""
+    assignments = json.loads(run_command([
+        "az", "role", "assignment", "list",
+        "--assignee-object-id", principal_id,
+        "--all",
+        "--query", "[].{role:roleDefinitionName, scope:scope}",
+        "-o", "json",
+    ], capture_output=True) or "[]")
+    # ARM may return resource IDs with different casing, so compare scopes lowercased
+    return {(item["role"], item["scope"].lower()) for item in assignments}
+
+
+# Helper function to ask the git CLI for a remote URL (slow path)
+def read_git_remote_url_from_cli(remote_name: str = "origin") -> str:
+    """Return `git remote get-url <remote_name>`, or "" if git or the remote is missing."""
+    try:
+        result = subprocess.run(
+            ["git", "remote", "get-url", remote_name],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return result.stdout.strip()
+
+
+# Helper function to read a git remote URL straight from .git/config (no `git` subprocess)
+def read_git_remote_url(remote_name: str = "origin") -> str:
+    """Return the remote's URL from REPO_ROOT/.git/config, or "" if there is none.
+    Falls back to the git CLI when the file is missing (e.g. a worktree, where
+    .git is a file) or can't be parsed."""
+    git_config = REPO_ROOT / ".git" / "config"
+    if not git_config.is_file():
+        return read_git_remote_url_from_cli(remote_name)
+
+    # strict=False: git allows repeated keys; no interpolation so "%" in URLs is kept as-is;
+    # allow_no_value: a bare key (e.g. `bare` under a [section]) means true in git
+    parser = configparser.ConfigParser(strict=False, interpolation=None, allow_no_value=True)
+    try:
+        parser.read(git_config)
+    except configparser.Error:
+        return read_git_remote_url_from_cli(remote_name)
+    section = f'remote "{remote_name}"'
+    return (parser.get(section, "url", fallback="") or "").strip()
+
+
+# GitHub repo detection from the git remote URL (cached, runs only when needed):
+@lru_cache(maxsize=1)
 def detect_github_owner_repo(remote_name: str = "origin") -> tuple[str | None, str | None]:
     """Return (owner, repo) from the git remote URL."""
-    remote_url = subprocess.run(
-        ["git", "remote", "get-url", remote_name],
-        capture_output=True,
-        text=True,
-        check=False,
-    ).stdout.strip()  # git remote URL (empty if command fails)
+    remote_url = read_git_remote_url(remote_name)
 
     # Normalize the URL by removing the ".git" suffix and trailing slashes
     cleaned = remote_url.replace(".git", "").rstrip("/")  # normalize suffix
@@ -244,16 +412,6 @@ def detect_github_owner_repo(remote_name: str = "origin") -> tuple[str | None, s
     # Failure: If we reach here, parsing has failed!
     return None, None
 
-# Let's set the GitHub owner and repo from the detected remote URL
-GITHUB_OWNER, GITHUB_REPO = detect_github_owner_repo()
-
-if GITHUB_OWNER and GITHUB_REPO:
-    logger.info(f"Auto-detected GitHub repository from git remote 'origin': "
-                f"{GITHUB_OWNER}/{GITHUB_REPO}")
-else:
-    logger.warning("GitHub repository not detected. Set them as "
-                   "github_owner and github_repo manually in terraform.tfvars")
-
 
 def main():
     """
@@ -269,6 +427,19 @@ def main():
     logger.info("     #### PaperCo O2C - Automated Deployment ####     ")
     logger.info("-"*60 + "\n")
     
+    # Detect the GitHub owner and repo from the git remote URL (for GitHub Actions OIDC)
+    github_owner, github_repo = detect_github_owner_repo()
+
+    if github_owner and github_repo:
+        logger.info(f"Auto-detected GitHub repository from git remote 'origin': "
+                    f"{github_owner}/{github_repo}")
+    else:
+        logger.warning("GitHub repository not detected. Set them as "
+                       "github_owner and github_repo manually in terraform.tfvars")
+
+    interactive = is_interactive()
+    if not interactive:
+        logger.info("Non-interactive mode: skipping manual pauses, reusing saved credentials")
 
     # ================ STEP 1: Validation & Prerequisites ===================
     log_step(1, "Validation & Prerequisites")
@@ -286,6 +457,11 @@ def main():
     log_step(3, "Deploy Infrastructure & Fetch Outputs")
     logger.info("Deploying Azure AI services + ACR + GitHub OIDC identity with Terraform (~5-10 min)...")
     
+    # Share one provider download cache between infra/azure and infra/gcp (unless user set one)
+    if "TF_PLUGIN_CACHE_DIR" not in os.environ:
+        TF_PLUGIN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        os.environ["TF_PLUGIN_CACHE_DIR"] = str(TF_PLUGIN_CACHE_DIR)
+
     # Set GitHub token as environment variable for Terraform GitHub provider (if available)
     terraform_env_var = os.environ.copy()
     
@@ -296,7 +472,7 @@ def main():
         logger.warning("No GitHub token - you'll need to create secrets manually later")
     
     # Note: Terraform needs init before output
-    run_command(["terraform", "init", "-upgrade"], working_dir=AZURE_INFRA_DIR)
+    run_command(terraform_init_command(), working_dir=AZURE_INFRA_DIR)
     
     # Build the Terraform apply command, including GitHub vars if detected
     terraform_apply_cmd = [
@@ -306,22 +482,48 @@ def main():
     ]
     
     # Add GitHub owner/repo if detected
-    if GITHUB_OWNER and GITHUB_REPO:
+    if github_owner and github_repo:
         terraform_apply_cmd.extend([
-            "-var", f"github_owner={GITHUB_OWNER}",
-            "-var", f"github_repo={GITHUB_REPO}"
+            "-var", f"github_owner={github_owner}",
+            "-var", f"github_repo={github_repo}"
         ])
-        logger.info(f"Configuring GitHub Actions for {GITHUB_OWNER}/{GITHUB_REPO}")
+        logger.info(f"Configuring GitHub Actions for {github_owner}/{github_repo}")
     else:
         logger.warning("GitHub repo not detected - GitHub Actions OIDC will need manual configuration! You should set 'github_owner' and 'github_repo' in `terraform.tfvars`")
     
-    # Run Terraform with GitHub token in environment (if available)
-    subprocess.run(
+    # Run Terraform with GitHub token in environment (if available).
+    # Azure and GCP stacks are independent, so the Azure apply runs in the
+    # background while STEP 4 deploys GCP; we wait for it before reading outputs.
+    logger.opt(lazy=True).info("$ {}", lambda: shlex.join(terraform_apply_cmd))
+    azure_apply = subprocess.Popen(
         terraform_apply_cmd,
         cwd=AZURE_INFRA_DIR,
         env=terraform_env_var,
-        check=True
     )
+
+
+    # ================ STEP 4: Deploy GCP Infrastructure ====================
+    log_step(4, "Deploy GCP Infrastructure")
+    logger.info("Deploying GCP project (3 min) while the Azure apply is running...")
+    logger.info(
+        "\nReminder (manual requirement by Google):\n"
+        "  - You'll still need to configure the OAuth consent screen, and\n"
+        "  - create the Desktop OAuth client after this.\n"
+        "Terraform only creates the Google project, and enables the Gmail API.\n"
+    )
+
+    try:
+        run_command(terraform_init_command(), working_dir=GCP_INFRA_DIR)
+        run_command(["terraform", "apply", "-auto-approve"], working_dir=GCP_INFRA_DIR)
+    except subprocess.CalledProcessError:
+        azure_apply.wait()  # Don't leave the Azure apply orphaned mid-write of its state
+        raise
+    
+    logger.success("GCP deployed")
+
+    logger.info("Waiting for the Azure Terraform apply to finish...")
+    if azure_apply.wait() != 0:
+        raise subprocess.CalledProcessError(azure_apply.returncode, azure_apply.args)
     
     logger.success("Azure AI services + ACR + GitHub Actions identity deployed")
     if github_token:
@@ -330,8 +532,9 @@ def main():
         logger.warning("GitHub secrets NOT created (gh CLI not authenticated). Create manually or run: gh auth login")
     
     logger.info("Reading Terraform outputs...")
+    raw_outputs = read_terraform_outputs(AZURE_INFRA_DIR)
     terraform_outputs = {
-        python_key: run_command(["terraform", "output", "-raw", tf_key], AZURE_INFRA_DIR, capture_output=True)
+        python_key: format_terraform_output(raw_outputs[tf_key]["value"])
         for tf_key, python_key in TERRAFORM_OUTPUT_KEYS.items()
     }
     logger.success(f"Retrieved {len(terraform_outputs)} Terraform outputs")
@@ -341,22 +544,6 @@ def main():
     collected_secrets["APPLICATIONINSIGHTS_CONNECTION_STRING"] = terraform_outputs["APPLICATIONINSIGHTS_CONNECTION_STRING"]
 
 
-    # ================ STEP 4: Deploy GCP Infrastructure ====================
-    log_step(4, "Deploy GCP Infrastructure")
-    logger.info("Deploying GCP project (3 min)...")
-    logger.info(
-        "\nReminder (manual requirement by Google):\n"
-        "  - You'll still need to configure the OAuth consent screen, and\n"
-        "  - create the Desktop OAuth client after this.\n"
-        "Terraform only creates the Google project, and enables the Gmail API.\n"
-    )
-
-    run_command(["terraform", "init", "-upgrade"], working_dir=GCP_INFRA_DIR)
-    run_command(["terraform", "apply", "-auto-approve"], working_dir=GCP_INFRA_DIR)
-    
-    logger.success("GCP deployed")
-  
-
     # ================ STEP 5: Manual Gmail OAuth Setup =====================
     log_step(5, "Manual Gmail OAuth Setup")
     logger.info("Manual step required:")
@@ -368,7 +555,8 @@ def main():
     )
     
     logger.info(manual_instructions)
-    input("\nComplete Gmail OAuth setup above, then press Enter when you're ready to continue...")
+    if interactive:
+        input("\nComplete Gmail OAuth setup above, then press Enter when you're ready to continue...")
 
 
     # ================ STEP 6: Validate Configuration Files =================   
@@ -382,6 +570,10 @@ def main():
     
     # Check for OAuth token file (contains refresh_token for unattended access)
     if not TOKEN_FILE.exists():
+        if not interactive:
+            logger.error("cred/token.json not found! Run scripts/authenticate_gmail.py first")
+            sys.exit(1)
+
         logger.warning("token.json not found - Gmail authentication required")
         logger.info("\nGmail OAuth needs browser interaction (impossible in containers).")
         logger.info("Running authentication helper to generate token.json...\n")
@@ -417,8 +609,10 @@ def main():
         "https://airtable.com/workspaces/<wsps...> where you'll be asked to enter it for saving as well.\n"
     )
 
-    input("\nPress Enter when ready to continue...")
-    airtable_secrets = airtable_setup_flow()
+    if interactive:
+        input("\nPress Enter when ready to continue...")
+    from scripts.airtable_setup import airtable_setup_flow  # Imported here: pulls in requests
+    airtable_secrets = airtable_setup_flow(interactive=interactive)
     if airtable_secrets:
         collected_secrets.update(airtable_secrets)
         logger.info(f"Collected {len(airtable_secrets)} Airtable secrets")
@@ -442,8 +636,10 @@ def main():
         "   6. Paste the bot token and channel name when prompted in Terminal...\n"
     )
     
-    input("\nPress Enter when ready to continue...")
-    slack_secrets = slack_setup_flow()
+    if interactive:
+        input("\nPress Enter when ready to continue...")
+    from scripts.slack_setup import slack_setup_flow  # Imported here: pulls in slack_sdk
+    slack_secrets = slack_setup_flow(interactive=interactive)
     if slack_secrets:
         collected_secrets.update(slack_secrets)
         logger.info(f"Collected {len(slack_secrets)} Slack secrets")
@@ -491,17 +687,6 @@ def main():
         "--env-vars", *env_var_args,
     ], working_dir=REPO_ROOT)
     
-    # Set scale and ACR auth via dedicated commands for better CLI compatibility
-    # (These two commands could be combined but need a preview extension installed in azure cli.)
-    run_command([
-        "az", "containerapp", "update",
-        "--name", app_name,
-        "--resource-group", resource_group,
-        "--revisions-mode", "single",  # only one active revision at a time
-        "--min-replicas", "0",
-        "--max-replicas", "1",
-    ], working_dir=REPO_ROOT)
-    
     logger.success("Container App deployed!")
     
     logger.info("\nLoading Gmail credentials and token...")
@@ -512,38 +697,45 @@ def main():
     
     logger.info("\nStoring secrets in Container App (encrypted at rest)...")
     
-    secret_args = []
-    for key in SENSITIVE_SECRET_KEYS:
-        value = collected_secrets.get(key)
-        if value:
-            # Container Apps expects secret names kebab-cased, values stay as-is
-            secret_name = key.lower().replace("_", "-")
-            secret_args.append(f"{secret_name}={value}")
+    secret_args = [
+        f"{secret_name}={collected_secrets[key]}"  # values stay as-is
+        for key, secret_name in SECRET_NAME_MAP.items() if collected_secrets.get(key)
+    ]
     
-    if secret_args:
+    # Only a hash is kept locally; it lets re-runs skip an unchanged secret set (and its revision)
+    app_key = f"{resource_group}/{app_name}"
+    secrets_digest = hashlib.sha256("\n".join(secret_args).encode()).hexdigest()
+    secret_names = [arg.split("=", 1)[0] for arg in secret_args]
+
+    if secret_args and secrets_unchanged(app_key, secrets_digest, app_name, resource_group, secret_names):
+        logger.info("Secrets unchanged since last deploy, skipping secret set")
+    elif secret_args:
         run_command([
             "az", "containerapp", "secret", "set",
             "--name", app_name,
             "--resource-group", resource_group,
             "--secrets", *secret_args,
         ])
+        save_secrets_digest(app_key, secrets_digest)
         logger.success(f"Stored {len(secret_args)} secrets securely")
     
     logger.info("\nConfiguring secret references...")
     
     secret_env_vars = [
-        f"{key}=secretref:{key.lower().replace('_', '-')}"
-        for key in SENSITIVE_SECRET_KEYS if collected_secrets.get(key)
+        f"{key}=secretref:{secret_name}"
+        for key, secret_name in SECRET_NAME_MAP.items() if collected_secrets.get(key)
     ]
     
+    # One update sets scale and secret references together, so only one new revision rolls out
+    run_command([
+        "az", "containerapp", "update",
+        "--name", app_name,
+        "--resource-group", resource_group,
+        "--min-replicas", "0",
+        "--max-replicas", "1",
+        *(["--set-env-vars", *secret_env_vars] if secret_env_vars else []),
+    ], working_dir=REPO_ROOT)
     if secret_env_vars:
-        # Update the container app to add secret references
-        run_command([
-            "az", "containerapp", "update",
-            "--name", app_name,
-            "--resource-group", resource_group,
-            "--set-env-vars", *secret_env_vars,
-        ])
         logger.success("Container configured to access secrets")
     
     logger.success("\nSecure deployment complete!")
@@ -553,20 +745,16 @@ def main():
     # ================ STEP 10: Enable Managed Identity =====================   
     log_step(10, "Enable Managed Identity")
     logger.info(f"Enabling managed identity for {app_name}...")
-    run_command([
+    identity = json.loads(run_command([  # Enable built-in managed identity on the container app
         "az", "containerapp", "identity", "assign",
         "--name", app_name,
         "--resource-group", resource_group,
         "--system-assigned",
-    ])  # Enable built-in managed identity on the container app
+        "-o", "json",
+    ], capture_output=True) or "{}")
 
-    managed_identity_principal_id = run_command([  # Ask Azure what principal ID was created
-        "az", "containerapp", "show",
-        "--name", app_name,
-        "--resource-group", resource_group,
-        "--query", "identity.principalId",
-        "-o", "tsv",
-    ], capture_output=True)
+    # The assign response already contains the principal ID that was created
+    managed_identity_principal_id = identity.get("principalId", "")
 
     if not managed_identity_principal_id:
         logger.error("Failed to read managed identity principal ID.")
@@ -577,40 +765,19 @@ def main():
     log_step(11, "Grant RBAC Roles")
     logger.info("Granting Azure resource access...")
     
+    # Each role is an independent `az` call, so run them side by side in threads
+    with ThreadPoolExecutor(max_workers=len(ROLE_ASSIGNMENTS)) as pool:
+        list(pool.map(  # list() re-raises the first worker exception, if any
+            lambda role: assign_role(managed_identity_principal_id, role[0],
+                                     terraform_outputs[role[1]], role[2]),
+            ROLE_ASSIGNMENTS,
+        ))
+
+    # Double-check all required roles are present with a single listing call
+    assigned_roles = list_assigned_roles(managed_identity_principal_id)
+
     for role_name, scope_key, service_description in ROLE_ASSIGNMENTS:
-        rbac_scope = terraform_outputs[scope_key]  # Grab resource ID for RBAC scope
-        try:
-            run_command([
-                "az", "role", "assignment", "create",
-                "--assignee-object-id", managed_identity_principal_id,
-                "--assignee-principal-type", "ServicePrincipal",
-                "--role", role_name,
-                "--scope", rbac_scope,
-            ])
-        except subprocess.CalledProcessError as exc:
-            # Allow idempotent "already exists" conflicts, fail fast otherwise.
-            err_text = getattr(exc, "stderr", "") or ""
-
-            if "RoleAssignmentExists" in err_text or "already exists" in err_text:
-                logger.warning(f"{role_name} already assigned for {service_description}.")
-            else:
-                logger.error(f"Failed to assign {role_name} for {service_description}: {err_text}")
-                raise
-
-    # Double-check all required roles are present for the current principal
-    for role_name, scope_key, service_description in ROLE_ASSIGNMENTS:
-        rbac_scope = terraform_outputs[scope_key]
-        
-        # Check assigned roles for the managed identity principal
-        assigned = run_command([
-            "az", "role", "assignment", "list",
-            "--assignee-object-id", managed_identity_principal_id,
-            "--scope", rbac_scope,
-            "--query", "[].roleDefinitionName",
-            "-o", "tsv",
-        ], capture_output=True).splitlines()
-        
-        if role_name not in assigned:
+        if (role_name, terraform_outputs[scope_key].lower()) not in assigned_roles:
             logger.error(f"Missing role {role_name} on {service_description} "
                          f"for principal {managed_identity_principal_id}")
             sys.exit(1)
@@ -1,5 +1,9 @@
 """Tear down Azure + GCP infra in one go, as simply as possible."""
+import json
+import os
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 from loguru import logger
@@ -8,12 +12,26 @@ from loguru import logger
 REPO_ROOT = Path(__file__).resolve().parent
 AZURE_INFRA_DIR = REPO_ROOT / "infra" / "azure"
 GCP_INFRA_DIR = REPO_ROOT / "infra" / "gcp"
+AZ_ACCOUNT_CACHE = Path.home() / ".cache" / "paperco" / "az_account.json"
+# Destroys are bound by cloud API latency, so walk more of the graph at once (Terraform default: 10)
+TF_PARALLELISM = os.getenv("PAPERCO_TF_PARALLELISM", "20")
+TF_OUTPUTS_CACHE_NAME = ".tfoutputs.cache.json"  # Written by deploy.py, stale once infra is gone
 
 
 def run_command(command: list[str], working_dir: Path | None = None) -> None:
-    """Run a shell command with logging."""
+    """Run a shell command with logging.
+    Output is streamed line by line as it arrives (a long destroy is never
+    silent), each line tagged with the directory it runs in so Azure and GCP
+    output running in parallel stays readable."""
     logger.info("$ " + " ".join(command))
-    subprocess.run(command, cwd=working_dir, check=True)
+    tag = working_dir.name if working_dir else command[0]
+    with subprocess.Popen(command, cwd=working_dir, stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT, text=True) as process:
+        for line in process.stdout:
+            if line.strip():
+                logger.info(f"[{tag}] {line.rstrip()}")
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
 
 
 def read_tfvar_value(tfvars_path: Path, key: str) -> str:
@@ -30,77 +48,102 @@ def read_tfvar_value(tfvars_path: Path, key: str) -> str:
     return ""
 
 
-def main() -> None:
-    """Main cleanup flow."""
-    logger.info("-" * 60)
-    logger.info("PaperCo O2C - DESTROY ALL RESOURCES")
-    logger.info("-" * 60)
-    logger.warning("This will delete Azure and GCP infrastructure created by Terraform!\n")
-
-    confirmation = input("Type 'destroy' to confirm: ").strip().lower()
-    if confirmation != "destroy":
-        logger.info("Aborted by user.")
+# Helper function to get the subscription ID and signed-in user without
+# starting the (slow) az CLI on every run
+def get_azure_context() -> tuple[str, str]:
+    """Return (subscription_id, admin_email).
+    Order: AZURE_SUBSCRIPTION_ID / AZURE_ADMIN_EMAIL env vars, then the local
+    cache, then `az account show`. The cache is stale once `az login` or
+    `az account set` rewrites azureProfile.json."""
+    env_subscription = os.environ.get("AZURE_SUBSCRIPTION_ID")
+    env_email = os.environ.get("AZURE_ADMIN_EMAIL")
+    if env_subscription and env_email:
+        return env_subscription, env_email
+
+    azure_config_dir = Path(os.environ.get("AZURE_CONFIG_DIR", Path.home() / ".azure"))
+    profile = azure_config_dir / "azureProfile.json"
+    if (
+        AZ_ACCOUNT_CACHE.exists()
+        and profile.exists()
+        and AZ_ACCOUNT_CACHE.stat().st_mtime > profile.stat().st_mtime
+    ):
+        try:
+            cached = json.loads(AZ_ACCOUNT_CACHE.read_text())
+            return cached["subscription_id"], cached["admin_email"]
+        except (ValueError, KeyError):
+            pass  # Corrupt cache, fall through and refresh it
+
+    # One az call with JSON output instead of one call per field
+    account = json.loads(subprocess.run(
+        ["az", "account", "show", "-o", "json"],
+        stdout=subprocess.PIPE,  # stderr goes to the terminal, so az's own error is shown
+        text=True,
+        check=True,
+    ).stdout)
+    subscription_id, admin_email = account["id"], account["user"]["name"]
+
+    # Write to a temp file first, then swap it in so readers never see half a file
+    AZ_ACCOUNT_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = AZ_ACCOUNT_CACHE.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps({"subscription_id": subscription_id, "admin_email": admin_email}))
+    os.replace(tmp_file, AZ_ACCOUNT_CACHE)
+
+    return subscription_id, admin_email
+
+
+# Helper function to run `terraform init` only when the working dir needs it
+def terraform_init(infra_dir: Path) -> None:
+    """Skip init when providers are already installed and locked; otherwise run it.
+    -upgrade is only passed when PAPERCO_UPGRADE_PROVIDERS is set (same as deploy.py)."""
+    upgrade = bool(os.getenv("PAPERCO_UPGRADE_PROVIDERS"))
+    if not upgrade and (infra_dir / ".terraform").is_dir() and (infra_dir / ".terraform.lock.hcl").exists():
+        logger.info(f"Skipping terraform init in {infra_dir.name}: providers already installed.")
         return
+    run_command(["terraform", "init", *(["-upgrade"] if upgrade else [])], working_dir=infra_dir)
 
-    logger.info("Confirmation received. Starting cleanup...\n")
 
-    if subprocess.run(["which", "terraform"], capture_output=True).returncode != 0:
-        logger.error("terraform not found in PATH.")
-        sys.exit(1)
-    
-
-    # -----------------------------------
-    # ---------- Azure destroy ----------
-    # -----------------------------------
+def destroy_azure() -> None:
+    """Destroy the Azure infrastructure (skipped when there is no Terraform state)."""
     logger.info("=== [1/2] Destroying Azure infrastructure... ===")
     
     azure_state = AZURE_INFRA_DIR / "terraform.tfstate"
-    if azure_state.exists():
-        subscription_id = subprocess.run(
-            ["az", "account", "show", "--query", "id", "-o", "tsv"],
-            capture_output=True,
-            text=True,
-            check=True,
-        ).stdout.strip()
-        admin_email = subprocess.run(
-            ["az", "account", "show", "--query", "user.name", "-o", "tsv"],
-            capture_output=True,
-            text=True,
-            check=True,
-        ).stdout.strip()
-
-        run_command(["terraform", "init", "-upgrade"], working_dir=AZURE_INFRA_DIR)
-        run_command(
-            [
-                "terraform",
-                "destroy",
-                "-auto-approve",
-                "-var",
-                f"subscription_id={subscription_id}",
-                "-var",
-                f"admin_email={admin_email}",
-            ],
-            working_dir=AZURE_INFRA_DIR,
-        )
-
-        logger.success("Azure infrastructure destroyed!")
-    else:
+    if not azure_state.exists():
         logger.info("Skipping Azure: no terraform.tfstate found.")
+        return
+
+    subscription_id, admin_email = get_azure_context()
 
-    logger.info("")
+    terraform_init(AZURE_INFRA_DIR)
+    run_command(
+        [
+            "terraform",
+            "destroy",
+            "-auto-approve",
+            f"-parallelism={TF_PARALLELISM}",
+            "-var",
+            f"subscription_id={subscription_id}",
+            "-var",
+            f"admin_email={admin_email}",
+        ],
+        working_dir=AZURE_INFRA_DIR,
+    )
 
+    logger.success("Azure infrastructure destroyed!")
 
-    # -----------------------------------
-    # ---------- GCP destroy ------------
-    # -----------------------------------
+
+def destroy_gcp() -> None:
+    """Destroy the GCP resources via Terraform, then delete the project via gcloud."""
     logger.info("=== [2/2] Destroying GCP project... ===")
     
     project_id = read_tfvar_value(GCP_INFRA_DIR / "terraform.tfvars", "project_id")
     gcp_state = GCP_INFRA_DIR / "terraform.tfstate"
     
     if gcp_state.exists():
-        run_command(["terraform", "init", "-upgrade"], working_dir=GCP_INFRA_DIR)
-        run_command(["terraform", "destroy", "-auto-approve"], working_dir=GCP_INFRA_DIR)
+        terraform_init(GCP_INFRA_DIR)
+        run_command(
+            ["terraform", "destroy", "-auto-approve", f"-parallelism={TF_PARALLELISM}"],
+            working_dir=GCP_INFRA_DIR,
+        )
         logger.success("GCP resources destroyed via Terraform.")
     else:
         logger.info("Skipping Terraform GCP destroy: no terraform.tfstate found.")
@@ -111,6 +154,49 @@ def main() -> None:
     else:
         logger.info("No project_id found in terraform.tfvars; skipping gcloud delete.")
 
+
+def main() -> None:
+    """Main cleanup flow."""
+    logger.info("-" * 60)
+    logger.info("PaperCo O2C - DESTROY ALL RESOURCES")
+    logger.info("-" * 60)
+    logger.warning("This will delete Azure and GCP infrastructure created by Terraform!\n")
+
+    confirmation = input("Type 'destroy' to confirm: ").strip().lower()
+    if confirmation != "destroy":
+        logger.info("Aborted by user.")
+        return
+
+    logger.info("Confirmation received. Starting cleanup...\n")
+
+    # Drop deploy.py's cached Terraform outputs up front, even if a destroy fails halfway
+    for infra_dir in (AZURE_INFRA_DIR, GCP_INFRA_DIR):
+        (infra_dir / TF_OUTPUTS_CACHE_NAME).unlink(missing_ok=True)
+
+    if shutil.which("terraform") is None:
+        logger.error("terraform not found in PATH.")
+        sys.exit(1)
+    
+
+    # Azure and GCP have separate state, so both teardowns run at the same time
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = {"Azure": pool.submit(destroy_azure), "GCP": pool.submit(destroy_gcp)}
+
+    failed = []
+    for cloud, future in futures.items():  # One cloud failing doesn't cancel the other
+        try:
+            future.result()
+        except subprocess.CalledProcessError as exc:
+            logger.error(f"{cloud} destroy failed: `{' '.join(exc.cmd)}` exited with code "
+                         f"{exc.returncode} (see its output above)")
+            failed.append(cloud)
+        except (json.JSONDecodeError, KeyError, OSError) as exc:  # Unreadable az output, missing CLI
+            logger.error(f"{cloud} destroy failed: {exc!r}")
+            failed.append(cloud)
+
+    if failed:
+        sys.exit(1)
+
     logger.success("Cleanup complete!")
     logger.info("To redeploy: run `python deploy.py`")
 
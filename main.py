@@ -1,6 +1,7 @@
 """Command-line entry point for the PaperCo PO intake workflow."""
 
 import asyncio
+import os
 
 from src.shared.logging_config import configure_logging
 from src.workflow.workflow import (
@@ -10,8 +11,9 @@ from src.workflow.workflow import (
 def main() -> None:
     """Start the asynchronous Gmail polling loop."""
     
-    # Initialize logging ONCE at application startup
-    configure_logging(level="DEBUG")
+    # Initialize logging ONCE at application startup.
+    # Set LOG_LEVEL=INFO to skip the verbose (and costly) debug JSON dumps.
+    configure_logging(level=os.getenv("LOG_LEVEL", "DEBUG"))
     
     # # UNCOMMENT BELOW to run the workflow:
     asyncio.run(run_till_mail_read())
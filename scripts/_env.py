@@ -0,0 +1,41 @@
+"""Shared `.env` writer for the setup scripts."""
+
+import os
+import stat
+from pathlib import Path
+
+ENV_FILE = Path(__file__).resolve().parents[1] / ".env"
+
+
+# Helper function to quote a value the way python-dotenv reads it back
+def quote_env_value(value: str) -> str:
+    """Single-quote a value, escaping the backslashes and quotes dotenv unescapes."""
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+# Helper function to write several keys to `.env` in one go
+def save_env_values(updates: dict[str, str], env_file: Path = ENV_FILE) -> None:
+    """Merge updates into `.env` with a single atomic write.
+
+    Existing keys (including `export KEY=...` lines) are replaced in place so
+    comments and order survive, and the file keeps its permissions. A new
+    `.env` is created 0600 since it holds secrets.
+    """
+    if not updates:
+        return
+    lines = env_file.read_text().splitlines() if env_file.exists() else []
+    pending = dict(updates)
+    for i, line in enumerate(lines):
+        lhs = line.split("=", 1)[0].strip()
+        prefix = "export " if lhs.startswith("export ") else ""
+        key = lhs.removeprefix("export ").strip()
+        if "=" in line and key in pending:
+            lines[i] = f"{prefix}{key}={quote_env_value(pending.pop(key))}"
+    lines += [f"{key}={quote_env_value(value)}" for key, value in pending.items()]
+
+    mode = stat.S_IMODE(env_file.stat().st_mode) if env_file.exists() else 0o600
+    tmp_file = env_file.with_name(".env.tmp")
+    tmp_file.write_text("\n".join(lines) + "\n")
+    os.chmod(tmp_file, mode)  # Before the swap, so the secrets are never more readable than before
+    os.replace(tmp_file, env_file)
@@ -7,21 +7,66 @@ and saves to .env (minimal interactive flow similar to slack_setup).
 import os
 import csv
 import sys
+import itertools
+import json
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-from dotenv import load_dotenv, set_key
+from dotenv import load_dotenv
 from loguru import logger
 
-load_dotenv()  # Load any existing .env values early
+try:
+    from ._env import save_env_values
+except ImportError:  # Run directly as `python scripts/<name>.py`
+    from _env import save_env_values
 
-API_KEY = os.getenv("AIRTABLE_API_KEY")
-WORKSPACE_ID = os.getenv("AIRTABLE_WORKSPACE_ID")  # Workspace URL contains id e.g. https://airtable.com/workspaces/<wspsXXXXXXXXXXXX>
+load_dotenv()  # Load any existing .env values early
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-ENV_FILE = BASE_DIR / ".env"
 PRODUCTS_CSV_FILE = BASE_DIR / "data/sample/airtable_products.csv"
 CUSTOMERS_CSV_FILE = BASE_DIR / "data/sample/airtable_customers.csv"
 
+
+class AirtableRetry(Retry):
+    """urllib3 retry rules that never replay a create that may have gone through.
+
+    GETs are retried on 429 and transient 5xx errors. POSTs (records, tables,
+    bases) are not idempotent: a 5xx or dropped connection may come after the
+    server already committed, so they are only retried on 429, which Airtable
+    returns before doing anything. Every retry also waits for a slot in our
+    own rate limiter, so retries don't burst past it.
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method.upper() == "POST":
+            return status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def sleep(self, response=None) -> None:
+        super().sleep(response)  # Backoff, or the server's Retry-After
+        wait_for_rate_limit()
+
+
+# Rate limits (429) and transient 5xx errors are retried by urllib3 with backoff
+RETRY_POLICY = AirtableRetry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=["GET"],  # Connection/read errors are only retried for GET
+    respect_retry_after_header=True,
+    raise_on_status=False,  # Hand back the last response so callers can log it
+)
+
+# Airtable allows 5 requests per second per base
+MAX_REQUESTS_PER_SECOND = 5
+_rate_lock = threading.Lock()
+_next_request_time = 0.0
+
 # Table schemas
 PRODUCTS_SCHEMA = [
     {"name": "SKU", "type": "singleLineText"},
@@ -52,10 +97,31 @@ CUSTOMERS_SCHEMA = [
 ]
 
 
-def create_base(workspace_id: str, base_name: str = "PaperCo O2C Demo") -> str:
+@dataclass
+class AirtableCtx:
+    """What every Airtable call needs, passed around instead of module globals."""
+    session: requests.Session
+    base_id: str = ""
+
+
+def make_session(api_key: str) -> requests.Session:
+    """Session with auth headers, keep-alive pooling and the retry policy.
+    Reusing it avoids a new TLS handshake per request."""
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=RETRY_POLICY))
+    return session
+
+
+def api_key_is_valid(session: requests.Session) -> bool:
+    """Cheap upfront check of the API key (one GET) before creating anything."""
+    response = session.get("https://api.airtable.com/v0/meta/bases", timeout=5)
+    return response.status_code == 200
+
+
+def create_base(session: requests.Session, workspace_id: str, base_name: str = "PaperCo O2C Demo") -> str:
     """Create a new Airtable base with tables and return its ID."""
     url = "https://api.airtable.com/v0/meta/bases"
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
     
     # Airtable requires at least one table with one field in the create request
     data = {
@@ -67,7 +133,7 @@ def create_base(workspace_id: str, base_name: str = "PaperCo O2C Demo") -> str:
         ]
     }
     
-    response = requests.post(url, headers=headers, json=data)
+    response = session.post(url, json=data)
     
     if response.status_code == 200:
         new_base_id = response.json()["id"]
@@ -78,62 +144,123 @@ def create_base(workspace_id: str, base_name: str = "PaperCo O2C Demo") -> str:
     sys.exit(1)
 
 
-def create_table(base_id: str, table_name: str, fields: list[dict]) -> None:
-    """Create a table in the base."""
-    url = f"https://api.airtable.com/v0/meta/bases/{base_id}/tables"
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+def create_table(ctx: AirtableCtx, table_name: str, fields: list[dict]) -> bool:
+    """Create a table in the base. Returns True on success."""
+    url = f"https://api.airtable.com/v0/meta/bases/{ctx.base_id}/tables"
     
-    response = requests.post(url, headers=headers, json={"name": table_name, "fields": fields})
+    response = ctx.session.post(url, json={"name": table_name, "fields": fields})
     
     if response.status_code == 200:
         logger.success(f"Created table: {table_name}")
-    else:
-        logger.warning(f"Failed to create {table_name}: {response.status_code} - {response.text}")
+        return True
 
+    logger.warning(f"Failed to create {table_name}: {response.status_code} - {response.text}")
+    return False
 
-def upload_csv(base_id: str, table_name: str, csv_path: Path) -> None:
-    """Upload CSV records to Airtable table in batches."""
-    url = f"https://api.airtable.com/v0/{base_id}/{table_name}"
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
-    
-    with open(csv_path, encoding='utf-8') as f:
-        rows = list(csv.DictReader(f))
-    
-    records = [{"fields": {k: v for k, v in row.items() if v.strip()}} for row in rows]
+
+def list_tables(ctx: AirtableCtx) -> dict[str, dict]:
+    """Return the base's tables keyed by name (empty if the base is gone or not ours).
+    Other errors (5xx, 429 after retries) raise, so an outage never leads to a new base."""
+    response = ctx.session.get(f"https://api.airtable.com/v0/meta/bases/{ctx.base_id}/tables")
+    if response.status_code in (403, 404):
+        return {}
+    response.raise_for_status()
+    return {table["name"]: table for table in response.json()["tables"]}
+
+
+def ensure_table(ctx: AirtableCtx, table_name: str, fields: list[dict], existing: dict[str, dict]) -> bool:
+    """Create the table only if it is not already in `existing`. Returns True if created."""
+    if table_name in existing:
+        logger.info(f"Table '{table_name}' already exists, skipping.")
+        return False
+    return create_table(ctx, table_name, fields)
+
+
+# Helper function to space requests out so we stay under Airtable's rate limit
+def wait_for_rate_limit() -> None:
+    """Block until the next request slot (shared across threads) is free."""
+    global _next_request_time
+    with _rate_lock:
+        now = time.monotonic()
+        wait = max(0.0, _next_request_time - now)
+        _next_request_time = max(now, _next_request_time) + 1 / MAX_REQUESTS_PER_SECOND
+    time.sleep(wait)
+
+
+def post_batch(ctx: AirtableCtx, url: str, batch: list[dict], batch_number: int) -> int:
+    """POST one batch of up to 10 records. Returns the number of records uploaded."""
+    # Encode compactly (no spaces after separators) instead of letting requests do it
+    body = json.dumps({"records": batch, "typecast": True}, separators=(",", ":")).encode()
+    wait_for_rate_limit()
+    response = ctx.session.post(url, data=body)
+
+    if response.status_code == 200:
+        logger.info(f"Uploaded batch {batch_number} ({len(batch)} records)")
+        return len(batch)
+
+    logger.error(f"Failed batch {batch_number}: {response.status_code} - {response.text}")
+    return 0
+
+
+# Helper function to split any iterable into lists of n items without loading it all
+def batched(iterable, n: int):
+    """Yield lists of up to n items from the iterable."""
+    it = iter(iterable)
+    while batch := list(itertools.islice(it, n)):
+        yield batch
+
+
+def upload_csv(ctx: AirtableCtx, table_name: str, csv_path: Path) -> None:
+    """Upload CSV records to Airtable table in batches (sent concurrently).
+    The CSV is streamed, so only a few batches are held in memory at a time."""
+    url = f"https://api.airtable.com/v0/{ctx.base_id}/{table_name}"
+    uploaded = total = 0
     
-    for i in range(0, len(records), 10):
-        batch = records[i:i+10]
-        response = requests.post(url, headers=headers, json={"records": batch, "typecast": True})
-        
-        if response.status_code == 200:
-            logger.info(f"Uploaded batch {i//10 + 1} ({len(batch)} records)")
-        else:
-            logger.error(f"Failed batch {i//10 + 1}: {response.status_code} - {response.text}")
+    with open(csv_path, encoding='utf-8') as f, \
+            ThreadPoolExecutor(max_workers=MAX_REQUESTS_PER_SECOND) as pool:
+        records = ({"fields": {k: s for k, v in row.items() if (s := v.strip())}} for row in csv.DictReader(f))
+        numbered_batches = enumerate(batched(records, 10), start=1)
+
+        # Send one window of batches per worker round instead of queueing the whole file
+        for window in batched(numbered_batches, MAX_REQUESTS_PER_SECOND):
+            total += sum(len(batch) for _, batch in window)
+            uploaded += sum(pool.map(
+                lambda numbered: post_batch(ctx, url, numbered[1], numbered[0]),
+                window,
+            ))
     
-    logger.success(f"Uploaded {len(records)} records to {table_name}")
+    logger.success(f"Uploaded {uploaded} of {total} records to {table_name}")
 
 
-def airtable_setup_flow() -> dict:
-    """Interactive Airtable setup: prompts for credentials, creates base, uploads data."""
-    global API_KEY, WORKSPACE_ID # 'global' is needed to modify these variables.
+def airtable_setup_flow(interactive: bool = True) -> dict:
+    """Interactive Airtable setup: prompts for credentials, creates base, uploads data.
+    With interactive=False, credentials must already be in `.env` (no prompts)."""
+    env_updates: dict[str, str] = {}  # Written to `.env` in one go once credentials are known
+    api_key = os.getenv("AIRTABLE_API_KEY")
+    workspace_id = os.getenv("AIRTABLE_WORKSPACE_ID")  # Workspace URL contains id e.g. https://airtable.com/workspaces/<wspsXXXXXXXXXXXX>
     
-    if not API_KEY:
+    if not interactive and not (api_key and workspace_id):
+        logger.error("AIRTABLE_API_KEY and AIRTABLE_WORKSPACE_ID must be set in `.env` "
+                     "for non-interactive setup.")
+        sys.exit(1)
+
+    if not api_key:
         logger.info(
             "AIRTABLE_API_KEY missing in `.env`. Create one at https://airtable.com/create/tokens")
         logger.info(
             "(Give it scopes: 'data.records:read/write', 'schema.bases:read/write')\n")
         
-        API_KEY = input("Paste Airtable API key: ").strip()
+        api_key = input("Paste Airtable API key: ").strip()
 
-        while len(API_KEY) < 15:
+        while len(api_key) < 15:
             logger.error("API key empty or incomplete. Please try again.\n")
             
-            API_KEY = input(
+            api_key = input(
                 "Paste a valid Airtable API key: "
             ).strip()
 
         # Save the Airtable API key to .env
-        set_key(ENV_FILE, "AIRTABLE_API_KEY", API_KEY)
+        env_updates["AIRTABLE_API_KEY"] = api_key
         
         logger.success("Saved API key to AIRTABLE_API_KEY in `.env`.")
     else:
@@ -142,44 +269,74 @@ def airtable_setup_flow() -> dict:
             "If you want to use a different key, replace it in the `.env` file manually.")
 
 
-    if not WORKSPACE_ID:
+    # Fail fast on a bad key instead of learning about it from the first create call
+    ctx = AirtableCtx(session=make_session(api_key))
+    while not api_key_is_valid(ctx.session):
+        if not interactive:
+            logger.error("AIRTABLE_API_KEY was rejected by Airtable.")
+            sys.exit(1)
+        logger.error("Airtable rejected this API key. Please try again.\n")
+        api_key = input("Paste a valid Airtable API key: ").strip()
+        ctx.session.headers["Authorization"] = f"Bearer {api_key}"
+        env_updates["AIRTABLE_API_KEY"] = api_key
+
+    if not workspace_id:
         logger.info("AIRTABLE_WORKSPACE_ID missing in `.env`. Find it in workspace URL:")
         logger.info("https://airtable.com/workspaces/<wspsID>")
         
-        WORKSPACE_ID = input("Paste workspace ID (starts with 'wsps'): ").strip()
+        workspace_id = input("Paste workspace ID (starts with 'wsps'): ").strip()
         
-        while not WORKSPACE_ID.startswith("wsps") or (len(WORKSPACE_ID) < 10):
+        while not workspace_id.startswith("wsps") or (len(workspace_id) < 10):
             logger.error("Invalid workspace ID. Please try again.\n")
             
-            WORKSPACE_ID = input(
+            workspace_id = input(
                 "Paste a valid workspace ID (starts with 'wsps'): "
             ).strip()
         
-        set_key(ENV_FILE, "AIRTABLE_WORKSPACE_ID", WORKSPACE_ID)
+        env_updates["AIRTABLE_WORKSPACE_ID"] = workspace_id
         
         logger.success("Saved workspace ID to AIRTABLE_WORKSPACE_ID in `.env`!")
     else:
         logger.warning(
             "An existing AIRTABLE_WORKSPACE_ID found in `.env` and will be re-used. "
             "If you want to use a different workspace, replace it in the `.env` file manually.")
+
+    save_env_values(env_updates)  # Persist credentials before anything can fail
         
-    logger.info(f"Creating base in workspace {WORKSPACE_ID}...")
-    
-    base_id = create_base(WORKSPACE_ID)
-    set_key(ENV_FILE, "AIRTABLE_BASE_ID", base_id)
+    tables = {"Products": (PRODUCTS_SCHEMA, PRODUCTS_CSV_FILE),
+              "Customers": (CUSTOMERS_SCHEMA, CUSTOMERS_CSV_FILE)}
+
+    # On reruns, reuse the base from `.env` (one metadata call) and only add missing tables
+    ctx.base_id = os.getenv("AIRTABLE_BASE_ID", "")
+    existing_tables = list_tables(ctx) if ctx.base_id else {}
+
+    if existing_tables:
+        logger.info(f"Reusing existing base {ctx.base_id}...")
+        to_upload = [name for name, (schema, _) in tables.items()
+                     if ensure_table(ctx, name, schema, existing_tables)]
+    else:
+        logger.info(f"Creating base in workspace {workspace_id}...")
+        
+        ctx.base_id = create_base(ctx.session, workspace_id)
+        save_env_values({"AIRTABLE_BASE_ID": ctx.base_id})
+
+        logger.success("Saved AIRTABLE_BASE_ID in `.env`.")
+        to_upload = list(tables)
 
-    logger.success("Saved AIRTABLE_BASE_ID in `.env`.")
     logger.info("Uploading CSV data...")
     
-    upload_csv(base_id, "Products", PRODUCTS_CSV_FILE)
-    upload_csv(base_id, "Customers", CUSTOMERS_CSV_FILE)
+    # The tables are independent; the shared rate limiter keeps the base under 5 req/s
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        uploads = [pool.submit(upload_csv, ctx, name, tables[name][1]) for name in to_upload]
+    for upload in uploads:
+        upload.result()  # Re-raise any upload error here
     
     logger.success("Airtable setup complete!")
     
     return {
-        "AIRTABLE_API_KEY": API_KEY,
-        "AIRTABLE_WORKSPACE_ID": WORKSPACE_ID,
-        "AIRTABLE_BASE_ID": base_id,
+        "AIRTABLE_API_KEY": api_key,
+        "AIRTABLE_WORKSPACE_ID": workspace_id,
+        "AIRTABLE_BASE_ID": ctx.base_id,
     }
 
 
@@ -4,22 +4,32 @@ Slack bot setup helper - saves bot token and approval channel to .env.
 No manifest API or admin tokens needed.
 """
 
-from math import log
+import hashlib
+import json
 import os
+import sys
+import time
 from pathlib import Path
 
-from dotenv import load_dotenv, set_key
+from dotenv import load_dotenv
 from loguru import logger
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+
+try:
+    from ._env import save_env_values
+except ImportError:  # Run directly as `python scripts/<name>.py`
+    from _env import save_env_values
 
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-ENV_FILE = BASE_DIR / ".env"
+CHANNEL_CACHE_DIR = Path.home() / ".cache" / "paperco"  # Same per-user cache dir as destroy.py
+CHANNEL_CACHE_TTL_SECONDS = 600  # Re-list channels at most every 10 minutes
 
 def test_bot_token(token: str) -> bool:
     """Verify the bot token works by calling auth.test."""
+    # slack_sdk is imported lazily so the prompts show up without waiting on it
+    from slack_sdk import WebClient
+    from slack_sdk.errors import SlackApiError
     try:
         client = WebClient(token=token)
         response = client.auth_test()
@@ -30,28 +40,66 @@ def test_bot_token(token: str) -> bool:
         return False
 
 
-def find_channel_id(token: str, channel_name: str) -> str:
-    """Look up channel ID by name (excludes archived channels)."""
+# Helper function to page through every channel the bot can see
+def list_channel_ids(token: str) -> dict[str, str] | None:
+    """Return the channel name -> ID map (excludes archived channels), or None on API errors."""
+    from slack_sdk import WebClient
+    from slack_sdk.errors import SlackApiError
+
     client = WebClient(token=token)
+    channel_ids: dict[str, str] = {}
+    cursor = None
     try:
-        response = client.conversations_list(
-            types="public_channel,private_channel",
-            exclude_archived=True,
-            limit=200
-        )
-        channels = response.get("channels", [])
-        for channel in channels:
-            if channel.get("name") == channel_name:
-                return channel["id"]
-        return ""
+        while True:
+            response = client.conversations_list(
+                types="public_channel,private_channel",
+                exclude_archived=True,
+                limit=1000,
+                cursor=cursor,
+            )
+            channel_ids.update({c["name"]: c["id"] for c in response.get("channels", [])})
+            cursor = response.get("response_metadata", {}).get("next_cursor")
+            if not cursor:
+                return channel_ids
     except SlackApiError:
+        return None
+
+
+def find_channel_id(token: str, channel_name: str) -> str:
+    """Look up channel ID by name (excludes archived channels).
+    The name -> ID map is cached for 10 minutes so setup reruns don't re-list
+    the whole workspace; a name missing from the cache (e.g. a channel created
+    since) always triggers a fresh listing."""
+    # Stable per-token file name (the built-in hash() changes between runs)
+    token_key = hashlib.sha256(token.encode()).hexdigest()[:16]
+    cache_file = CHANNEL_CACHE_DIR / f"slack_channels_{token_key}.json"
+
+    if cache_file.exists() and time.time() - cache_file.stat().st_mtime < CHANNEL_CACHE_TTL_SECONDS:
+        channel_id = json.loads(cache_file.read_text()).get(channel_name)
+        if channel_id:
+            return channel_id
+
+    channel_ids = list_channel_ids(token)
+    if channel_ids is None:
         return ""
+    CHANNEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(channel_ids))
+    os.chmod(tmp_file, 0o600)  # Channel names of a private workspace, keep them to this user
+    os.replace(tmp_file, cache_file)
+    return channel_ids.get(channel_name, "")
 
 
-def slack_setup_flow() -> dict:
-    """Interactive Slack bot setup."""
+def slack_setup_flow(interactive: bool = True) -> dict:
+    """Interactive Slack bot setup.
+    With interactive=False, the token and channel must already be in `.env` (no prompts)."""
     bot_token = os.getenv("SLACK_BOT_TOKEN", "").strip()
     
+    if not interactive and not (bot_token and os.getenv("SLACK_APPROVAL_CHANNEL", "").strip()):
+        logger.error("SLACK_BOT_TOKEN and SLACK_APPROVAL_CHANNEL must be set in `.env` "
+                     "for non-interactive setup.")
+        sys.exit(1)
+
     if not bot_token:
         logger.info(
             "\nSLACK_BOT_TOKEN missing in `.env`. Create a Slack App at "
@@ -69,10 +117,7 @@ def slack_setup_flow() -> dict:
                 "Please paste the valid 'Bot User OAuth Token' (xoxb-...): "
             ).strip()
         
-        # Save the bot token to .env
-        set_key(ENV_FILE, "SLACK_BOT_TOKEN", bot_token)
-
-        logger.success("Saved Slack Bot User OAuth Token to SLACK_BOT_TOKEN in `.env`.")
+        logger.success("Slack Bot User OAuth Token will be saved to SLACK_BOT_TOKEN in `.env`.")
     else:
         logger.warning(
             "An existing SLACK_BOT_TOKEN found in `.env` and will be re-used. "
@@ -99,7 +144,7 @@ def slack_setup_flow() -> dict:
 
     default_channel = existing_channel.lstrip("#") or "orders"
     
-    channel_name = input(
+    channel_name = default_channel if not interactive else input(
         "\nEnter Slack's Sales approval channel name (without #), or the channel ID "
         "(starts with 'C'), or press enter to use the 'orders' channel: "
     ).strip() or default_channel
@@ -107,6 +152,10 @@ def slack_setup_flow() -> dict:
     channel_id = channel_name if channel_name.startswith("C") \
         else find_channel_id(bot_token, channel_name)
     
+    if not channel_id and not interactive:
+        logger.error(f"Channel {channel_name} not found. Invite the bot to it or set its ID in `.env`.")
+        sys.exit(1)
+
     while not channel_id:
         logger.warning(
             f"Channel {channel_name} not found. Make sure the bot is invited to that channel first!")
@@ -117,8 +166,9 @@ def slack_setup_flow() -> dict:
     #     logger.error("Invalid channel ID. It should start with 'C'. Please try again.")
     #     channel_id = input("Paste channel ID (starts with C): ").strip()
     
-    set_key(ENV_FILE, "SLACK_APPROVAL_CHANNEL", channel_id)
-    logger.success("Saved Slack Approval Channel ID to SLACK_APPROVAL_CHANNEL in `.env`.")
+    # Save the token and channel to .env with one write
+    save_env_values({"SLACK_BOT_TOKEN": bot_token, "SLACK_APPROVAL_CHANNEL": channel_id})
+    logger.success("Saved SLACK_BOT_TOKEN and SLACK_APPROVAL_CHANNEL in `.env`.")
 
     logger.info("\n" + "="*60)
     logger.info("Setup complete!")
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Annotated
 
 from agent_framework import ChatAgent, ai_function
@@ -7,6 +8,7 @@ from invoice.invoice_tools import generate_invoice_pdf_url
 from messaging.slack_approval import post_approval_request, get_approval_from_slack
 
 from agents.base import chat_client
+from shared.async_utils import run_in_thread
 
 from emailing.gmail_tools import respond_confirmation_email
 
@@ -16,31 +18,57 @@ from crm.airtable_tools import (
     add_new_customer,
 )
 
-from aisearch.azure_search_tools import (
-    ingest_products_from_airtable,
-    ingest_customers_from_airtable,
-)
+
+# Helper function to apply an approved order to Airtable in plain Python,
+# so the fulfiller agent does not spend a model turn per update.
+def _record_approved_order(retrieved_po: dict[str, Any], customer_id: str) -> None:
+    # Sum per SKU in case a product appears on several lines
+    ordered_qty_by_sku: dict[str, int] = {}
+    for item in retrieved_po.get("items", []):
+        sku = item["product_sku"]
+        ordered_qty_by_sku[sku] = ordered_qty_by_sku.get(sku, 0) + item["ordered_qty"]
+
+    # Stock and credit live in different tables, so write them side by side
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        inventory = pool.submit(update_inventory, ordered_qty_by_sku)  # One read + ceil(N/10) writes
+        credit = pool.submit(
+            update_customer_credit,
+            customer_id=customer_id,
+            order_amount=retrieved_po["order_total"],
+        )
+        futures = {"inventory": inventory, "customer credit": credit}
+        # Wait for both before raising, so the error names every write that failed
+        errors = [f"{name}: {future.exception()}" for name, future in futures.items() if future.exception()]
+    if errors:
+        raise RuntimeError("Airtable update failed (" + "; ".join(errors) + ")")
+    # No search re-ingest needed: the retriever rebuilds both indexes at the
+    # start of every run, and destroy_indexes drops them at the end.
 
 
 @ai_function
+@run_in_thread  # Waits on Slack for up to a minute; keep that off the event loop
 def send_confirmation_email_with_approval(
     message_id: str,
     invoice_url: str,
     retrieved_po: dict[str, Any],
+    customer_id: str,
 ) -> dict[str, str]:
     """Get human approval via Slack, then send confirmation email if approved.
     
     This function BLOCKS execution and waits for a human to approve or deny
-    the order by replying in a Slack thread. If approved, it immediately sends
-    the confirmation email. If denied, it returns denial status without sending.
+    the order by replying in a Slack thread. If approved, it updates inventory
+    and customer credit in Airtable, and only once that succeeded sends the
+    confirmation email. If denied, it returns denial status without sending.
     
     Args:
         message_id: Gmail message ID to reply to.
         invoice_url: The generated invoice URL to include in confirmation.
         retrieved_po: The enriched PO data (required for approval display).
+        customer_id: Customer ID to charge (the new ID if a customer was just created).
         
     Returns:
-        Dictionary with approval status and whether email was sent.
+        Dictionary with approval status, whether email was sent and whether
+        the CRM was updated.
     """
     import os
     
@@ -62,23 +90,37 @@ def send_confirmation_email_with_approval(
         timeout=60,  # 1 minute for human to respond
     )
     
-    # Step 3: If approved, send confirmation email immediately
+    # Step 3: If approved, update the CRM, then confirm to the customer
+    # (never promise an order by email that was not recorded)
     if approved:
+        try:
+            _record_approved_order(retrieved_po, customer_id)
+        except Exception as e:
+            return {
+                "status": "approved",
+                "email_sent": "false",
+                "crm_updated": "false",
+                "reason": f"Approved but CRM update failed, no email sent: {str(e)}",
+            }
+
         try:
             respond_confirmation_email(
                 message_id=message_id,
                 pdf_url=invoice_url,
             )
-            return {
-                "status": "approved",
-                "email_sent": "true",
-            }
         except Exception as e:
             return {
                 "status": "approved",
                 "email_sent": "false",
-                "reason": f"Approved but email failed: {str(e)}",
+                "crm_updated": "true",
+                "reason": f"CRM updated but email failed: {str(e)}",
             }
+
+        return {
+            "status": "approved",
+            "email_sent": "true",
+            "crm_updated": "true",
+        }
     else:
         print("[APPROVAL] ✗ Denied! No confirmation email sent.")
         return {
@@ -120,54 +162,44 @@ You receive a Decision object. Extract input_payload (the RetrievedPO) from it.
 
 CRITICAL: You MUST execute ALL steps in order. Do NOT skip steps. Do NOT return early.
 
+STEPS 1 and 2 do not depend on each other: request their tool calls together
+in ONE response (parallel tool calls).
+
 STEP 1 - Customer setup (if needed):
    • Check if customer_id equals 'NEW' or similar placeholder
    • If yes: call add_new_customer(customer_name, customer_email, customer_address)
-   • Then call ingest_customers_from_airtable()
-   • Continue to STEP 2
+     and use the returned customer_id from now on
 
 STEP 2 - Generate invoice:
    • Call generate_invoice_pdf_url(order_context=input_payload)
    • Store the returned URL string as invoice_url
    • Continue to STEP 3
 
-STEP 3 - Request human approval and send email:
+STEP 3 - Request human approval, update the CRM and send email:
    • Call send_confirmation_email_with_approval(
        message_id=input_payload.email_id,
        invoice_url=invoice_url,
-       retrieved_po=input_payload
+       retrieved_po=input_payload,
+       customer_id=<customer_id from STEP 1, else input_payload.customer_id>
      )
    • WAIT for the function to return (it blocks until human approves/denies in Slack)
-   • Check the response dictionary's 'status' field:
-     - If status == 'approved': Continue to STEP 4
-     - If status == 'denied': Skip STEP 4, go to STEP 5 with ok=False
-     - If status == 'error': Skip STEP 4, go to STEP 5 with ok=False
-
-STEP 4 - Update inventory and credit (ONLY if approved in STEP 3):
-   • For each item in input_payload.items:
-     - Call update_inventory(ordered_qty=item.ordered_qty, product_sku=item.product_sku)
-   • Call update_customer_credit(customer_id=input_payload.customer_id, order_amount=input_payload.order_total)
-   • Call ingest_products_from_airtable()
-   • Call ingest_customers_from_airtable()
-   • Continue to STEP 5
-
-STEP 5 - Return result:
+   • If approved, the function itself updates inventory and customer credit in
+     Airtable; do NOT call any other tool for that
+   • Continue to STEP 4
+
+STEP 4 - Return result:
    • Construct FulfillmentResult with:
-     - ok: True ONLY if STEP 3 was approved AND STEP 4 completed successfully
+     - ok: True ONLY if status == 'approved' AND crm_updated == 'true' AND email_sent == 'true'
      - order_id: input_payload.po_number
      - invoice_no: input_payload.po_number (use as invoice number)
    • Return the FulfillmentResult object
 
-Do NOT return FulfillmentResult until you have executed STEPS 1-4 completely."""
+Do NOT return FulfillmentResult until you have executed STEPS 1-3 completely."""
      ),
      tools=[
-          send_confirmation_email_with_approval,  # Approval + email combined
+          send_confirmation_email_with_approval,  # Approval + email + CRM update combined
           add_new_customer,
-          ingest_customers_from_airtable,
           generate_invoice_pdf_url,
-          update_inventory,
-          update_customer_credit,
-          ingest_products_from_airtable,
      ],
      response_format=FulfillmentResult,
 )
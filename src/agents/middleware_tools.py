@@ -91,10 +91,11 @@ def attach_middlewares(*agents: ChatAgent) -> None:
         # `agent.middleware` may be None/tuple/list, so we normalize it to a list.
         current = list(getattr(agent, "middleware") or [])
 
-        # If any instance of middlewares is present in the list, we skip adding it again:
-        for midw_class in (ToolCaptureMiddleware, AgentCaptureMiddleware):
-            if not any(isinstance(midw, midw_class) for midw in current):
-                current.append(midw_class())
+        # If any instance of middlewares is present in the list, we skip adding it again.
+        # Otherwise we add the shared instance (defined at the bottom of this module):
+        for shared_midw in (TOOL_CAPTURE_MIDDLEWARE, AGENT_CAPTURE_MIDDLEWARE):
+            if not any(isinstance(midw, type(shared_midw)) for midw in current):
+                current.append(shared_midw)
 
         agent.middleware = current
 
@@ -130,22 +131,18 @@ class ToolCaptureMiddleware(FunctionMiddleware):
             "for function '{}' | Duration: {}ms",
             tool_name, duration_ms)
 
-        # NOW, get the function result after the tool has executed
-        tool_result = json.dumps(
-            context.result if context.result else {},
-            indent=3,
-            ensure_ascii=False
-        )
-
         tool_arguments = context.arguments # Get the tool's input arguments
 
         logger.opt(colors=True).debug("<yellow>[ToolCaptureMiddleware] '{}' "
                                        "function's args:\n{}</yellow>",
                                        tool_name, tool_arguments)
 
-        logger.opt(colors=True).debug("<yellow>[ToolCaptureMiddleware] '{}' "
-                                       "function's captured result(s):\n{}</yellow>",
-                                       tool_name, tool_result)
+        # lazy=True: the result is only serialized to JSON when DEBUG logging is on
+        logger.opt(colors=True, lazy=True).debug(
+            "<yellow>[ToolCaptureMiddleware] '{}' function's captured result(s):\n{}</yellow>",
+            lambda: tool_name,
+            lambda: json.dumps(context.result or {}, indent=3, ensure_ascii=False),
+        )
         
         # Record the ai search payloads for fact-checker grounding checks,
         # if applicable, meaning that the tool has to be in our predefined list.
@@ -193,13 +190,6 @@ class AgentCaptureMiddleware(AgentMiddleware):
                 agent_name)
             raise ValueError("Agent finished with no results!")
         
-        # Serialize the agent's result to a formatted JSON string for logging
-        agent_result = json.dumps(
-            ctx_result.to_dict(),  # to_dict() converts it to dict so we can serialize it
-            indent=3,
-            ensure_ascii=False
-    )
-
         # Serialize agent's context.messages: extract role & text from each ChatMessage
         agent_messages_list = [
             {
@@ -214,17 +204,21 @@ class AgentCaptureMiddleware(AgentMiddleware):
         #     msg.to_dict() for msg in context.messages
         # ]
 
-        # Convert the list of messages to a formatted JSON string for logging
-        agent_messages = json.dumps(
-            agent_messages_list,
-            indent=3,
-            ensure_ascii=False
+        # lazy=True: the JSON below is only built when DEBUG logging is on,
+        # so normal runs skip serializing every agent result and transcript.
+        logger.opt(colors=True, lazy=True).debug(
+            "<magenta>[AgentCaptureMiddleware] Agent result:\n{}</magenta>",
+            lambda: json.dumps(ctx_result.to_dict(), indent=3, ensure_ascii=False),
         )
 
-        logger.opt(colors=True).debug("<magenta>[AgentCaptureMiddleware] Agent "
-                                      "result:\n{}</magenta>",
-                                      agent_result)
-        
-        logger.opt(colors=True).debug("<magenta>[AgentCaptureMiddleware] Agent "
-                                      "messages:\n{}</magenta>",
-                                      agent_messages)
+        logger.opt(colors=True, lazy=True).debug(
+            "<magenta>[AgentCaptureMiddleware] Agent messages:\n{}</magenta>",
+            lambda: json.dumps(agent_messages_list, indent=3, ensure_ascii=False),
+        )
+
+
+# One instance of each middleware is shared by every agent. They keep no
+# per-agent state (captures go to the module-level lists above), so there is
+# no need for a separate copy per agent.
+TOOL_CAPTURE_MIDDLEWARE = ToolCaptureMiddleware()
+AGENT_CAPTURE_MIDDLEWARE = AgentCaptureMiddleware()
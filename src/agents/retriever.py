@@ -1,3 +1,4 @@
+import math
 from typing import Annotated
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 
@@ -173,9 +174,11 @@ class RetrievedPO(BaseModel):
     @model_validator(mode="after")  # "after" means this runs after the model has been created
     def _set_totals(self) -> "RetrievedPO":
         self.customer_available_credit = self.customer_overall_credit_limit - self.customer_open_ar
-        self.tax = sum(item.subtotal * item.vat_rate for item in self.items)
-        self.shipping = 25.0 if sum(item.subtotal for item in self.items) > 0 else 0.0
-        self.subtotal = sum(item.subtotal for item in self.items)
+        # Line subtotals are already set by RetrievedItem; sum them once and reuse.
+        # math.fsum: C-level sum without float drift across many line items
+        self.subtotal = math.fsum(item.subtotal for item in self.items)
+        self.tax = math.fsum(item.subtotal * item.vat_rate for item in self.items)
+        self.shipping = 25.0 if self.subtotal > 0 else 0.0
         self.order_total = self.subtotal + self.tax + self.shipping
         self.customer_can_order_with_credit = self.customer_available_credit >= self.order_total
         # Auto-populate evidence from middleware capture without relying on LLM
@@ -189,12 +192,13 @@ retriever = ChatAgent(
     instructions=(
         "You are an order enrichment specialist. Given a ParsedPO containing customer details and line items, "
         "your job is to refresh Azure AI Search data sources, then resolve the PO details. Follow this exact order:\n\n"
-        "1. Call create_customer_index_schema() to create or update the customer index before doing anything else.\n"
-        "2. Call create_products_index_schema() so the products index schema is also ready.\n"
-        "3. Call ingest_customers_from_airtable() to load the latest customer table from Airtable CRM into Azure Search.\n"
-        "4. Call ingest_products_from_airtable() to load the latest products table from Airtable.\n"
-        "5. Only after the indexes are refreshed may you search: use search_customers() with the ParsedPO customer info, "
-        "then search_products() for every ParsedPO line item. Compare at least the top few results with each other, and "
+        "1. In ONE response, call create_customer_index_schema() and create_products_index_schema() together "
+        "(parallel tool calls) to create or update both indexes before doing anything else.\n"
+        "2. In ONE response, call ingest_customers_from_airtable() and ingest_products_from_airtable() together "
+        "to load the latest customer and product tables from Airtable CRM into Azure Search.\n"
+        "3. Only after the indexes are refreshed may you search. The lookups are independent, so request them ALL in "
+        "ONE response: search_customers() with the ParsedPO customer info, plus one search_products() call per "
+        "ParsedPO line item. Compare at least the top few results with each other, and "
         "do NOT blindly take the first hit! Pick the SKU/title/finish that best matches the ParsedPO wording. "
         "Pay attention to the possible translations.\n\n"
         "While searching, pick the best matches and capture customerId, companyName, creditLimit, openAR, addresses, "
@@ -13,19 +13,22 @@ from loguru import logger
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 # Airtable data fetchers
+import asyncio
 import json  # For JSON parsing
-from functools import lru_cache  # cache function results to optimize performance
+import threading  # Lock for the search result cache
+from functools import cache, lru_cache  # cache function results to optimize performance
 from typing import Any, Sequence  # Any: generic type, Sequence: list/tuple
 from dotenv import load_dotenv
 
 # Import Airtable data access functions
 from crm.airtable_tools import get_all_products, get_all_customers
+from shared.async_utils import run_in_thread
 
 # Agent framework decorator, for AI function registration
 from agent_framework import AgentExecutorResponse, WorkflowContext, ai_function, executor
 
 # Azure SDK imports
-from azure.identity import DefaultAzureCredential  # Managed identity auth
+from shared.azure_auth import CREDENTIAL  # Shared managed identity credential
 
 # This performs search operations (queries) against an index & manages documents.
 # It is used for searching, uploading, merging, and deleting documents.
@@ -77,7 +80,6 @@ OPENAI_EMBED_DEP_NAME = _get_env_var("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
 SERVICE_ENDPOINT = _get_env_var("AZURE_SEARCH_ENDPOINT")
 
 # Initialize Azure clients with managed identity
-CREDENTIAL = DefaultAzureCredential()
 INDEX_CLIENT = SearchIndexClient(endpoint=SERVICE_ENDPOINT, credential=CREDENTIAL)
 
 # Index configuration constants
@@ -87,6 +89,13 @@ VECTOR_FIELD_NAME = "searchableContentVector"  # Field for vector embeddings
 VECTOR_DIMENSIONS = 3072  # text-embedding-3-large dimensions
 VECTOR_ALGO_NAME = "hnsw-algo"  # Algorithm identifier
 
+# Results of identical searches (same index, normalized query and options),
+# reused until that index's documents change. The agent often repeats a lookup
+# while comparing candidates, and each repeat costs a query embedding plus a
+# semantic rerank. Cleared whenever an index is re-ingested or deleted.
+_search_cache: dict[tuple, list[dict[str, Any]]] = {}
+_search_cache_lock = threading.Lock()
+
 
 # ============================================================================
 # VECTOR SEARCH CONFIGURATION: HNSW + Azure OpenAI EMBEDDINGS
@@ -360,6 +369,7 @@ def _customer_fields() -> list[SearchField]:
 # ============================================================================
 
 @ai_function
+@run_in_thread  # Blocking index call; lets both schema calls in one turn overlap
 def create_products_index_schema() -> dict[str, Any]:
     """
     Creates or updates the products search index schema.
@@ -389,6 +399,7 @@ def create_products_index_schema() -> dict[str, Any]:
 
 
 @ai_function
+@run_in_thread
 def create_customer_index_schema() -> dict[str, Any]:
     """
     Creates or updates the customers search index schema.
@@ -420,6 +431,26 @@ def create_customer_index_schema() -> dict[str, Any]:
 # ============================================================================
 
 
+# One SearchClient per index, reused for every upload and query. A client keeps
+# its HTTP connection pool and cached token, so building a new one per call
+# meant a fresh TLS handshake and token check on each search.
+# (Clients only hold the endpoint + index name, so they survive index re-creation.)
+@cache
+def _get_search_client(index_name: str) -> SearchClient:
+    return SearchClient(
+        endpoint=SERVICE_ENDPOINT,  # AI Search endpoint
+        index_name=index_name,  # Target index
+        credential=CREDENTIAL,  # Managed identity
+    )
+
+
+# Helper function to forget cached search results for an index whose documents changed
+def _clear_search_cache(index_name: str) -> None:
+    with _search_cache_lock:
+        for key in [key for key in _search_cache if key[0] == index_name]:
+            del _search_cache[key]
+
+
 def _upload_documents_to_index(
     index_name: str,
     documents: list[dict[str, Any]]
@@ -432,16 +463,14 @@ def _upload_documents_to_index(
         index_name: Name of the target index
         documents: list of document dictionaries to upload
     """
-    search_client = SearchClient(
-        endpoint=SERVICE_ENDPOINT,  # AI Search endpoint
-        index_name=index_name,  # Target index
-        credential=CREDENTIAL,  # Managed identity
-    )
+    search_client = _get_search_client(index_name)
 
     search_client.upload_documents(documents=documents)  # Batch upload
+    _clear_search_cache(index_name)
 
 
 @ai_function
+@run_in_thread  # Runs alongside ingest_customers_from_airtable when called in the same turn
 def ingest_products_from_airtable() -> dict[str, Any]:
     """
     Fetches product data from Airtable and uploads to products index.
@@ -516,6 +545,7 @@ def ingest_products_from_airtable() -> dict[str, Any]:
 
 
 @ai_function
+@run_in_thread
 def ingest_customers_from_airtable() -> dict[str, Any]:
     """
     Fetches customer data from Airtable and uploads to customers index.
@@ -600,11 +630,22 @@ def _semantic_and_hybrid_search(
            list[dict[str, Any]]: A list of search result documents.
     """
 
-    search_client = SearchClient(
-        endpoint=SERVICE_ENDPOINT,
-        index_name=index_name,
-        credential=CREDENTIAL
+    # Same index + same words (ignoring case/spacing) + same options = same results
+    cache_key = (
+        index_name,
+        " ".join(query_text.lower().split()),
+        top,
+        tuple(select) if select is not None else None,
+        filter,
+        semantic_config,
+        vector_field,
     )
+    with _search_cache_lock:
+        cached = _search_cache.get(cache_key)
+    if cached is not None:
+        return list(cached)
+
+    search_client = _get_search_client(index_name)
 
     vector_query = VectorizableTextQuery(
         text=query_text,
@@ -632,7 +673,11 @@ def _semantic_and_hybrid_search(
     results = search_client.search(**search_kwargs)
 
     # Convert results to list of dictionaries, containing only the document fields
-    return [dict(result) for result in results]
+    documents = [dict(result) for result in results]
+
+    with _search_cache_lock:
+        _search_cache[cache_key] = documents
+    return list(documents)
 
 
 def _search_customers(
@@ -723,8 +768,9 @@ def _search_products(
 # We couldn't decorate the internal functions directly because
 # they have parameters that was giving issues with type checking.
 # So we wrap them in these ai_function-decorated functions.
-search_customers = ai_function(_search_customers)
-search_products = ai_function(_search_products)
+# run_in_thread lets the agent's parallel search calls (one per line item) overlap.
+search_customers = ai_function(run_in_thread(_search_customers))
+search_products = ai_function(run_in_thread(_search_products))
 
 
 # Executor func to delete both indexes from Azure AI Search at the end of workflow
@@ -739,6 +785,8 @@ def destroy_indexes(
     
     INDEX_CLIENT.delete_index(INDEX_NAME_PRODUCTS)
     INDEX_CLIENT.delete_index(INDEX_NAME_CUSTOMERS)
+    _clear_search_cache(INDEX_NAME_PRODUCTS)
+    _clear_search_cache(INDEX_NAME_CUSTOMERS)
     
     logger.info(
         "[FUNCTION destroy_indexes] ✓ Deleted the indexes '{}' and '{}' "
@@ -757,13 +805,15 @@ def destroy_indexes(
 if __name__ == "__main__":
     print("\n" + "=" * 40 + "\n CREATING INDEX SCHEMAS" + "\n" + "=" * 40 + "\n")
 
-    create_products_index_schema()
-    create_customer_index_schema()
+    # Like the ingest tools below, the schema tools are async (worker thread)
+    asyncio.run(create_products_index_schema())
+    asyncio.run(create_customer_index_schema())
 
     print("\n" + "=" * 40 + "\n INGESTING DOCS FROM AIRTABLE" + "\n" + "=" * 40 + "\n")
       
-    ingest_products_from_airtable()
-    ingest_customers_from_airtable()
+    # The ingest tools are async (they run in a worker thread), so drive them with asyncio
+    asyncio.run(ingest_products_from_airtable())
+    asyncio.run(ingest_customers_from_airtable())
 
     print("\n" + "=" * 40 + "\n EXAMPLE SEARCHES:" + "\n" + "=" * 40 + "\n")
 
@@ -4,7 +4,10 @@ Handles Airtable API for: sync jobs, customer creation, direct lookups.
 Resolver agent uses Azure AI Search for reads, not this module.
 """
 
+import copy
 import os
+import threading
+import time
 from datetime import datetime
 import requests
 from typing import Any
@@ -13,6 +16,7 @@ from loguru import logger
 
 from agent_framework import ai_function
 
+
 # ============================================================================
 # ENVIRONMENT CONFIGURATION
 # ============================================================================
@@ -26,19 +30,39 @@ AIRTABLE_CUSTOMERS_TABLE = os.getenv("AIRTABLE_CUSTOMERS_TABLE", "Customers")
 AIRTABLE_API_URL = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}"
 AIRTABLE_API_HEADER = {"Authorization": f"Bearer {AIRTABLE_API_KEY}"}
 
+# One shared HTTP session: keeps the TLS connection to Airtable alive between
+# calls instead of opening a new one for every request
+_session = requests.Session()
+
+# Airtable record IDs never change, so remember which record holds each
+# Customer ID / SKU: (table, key field) -> {key value: record ID}
+_record_id_cache: dict[tuple[str, str], dict[str, str]] = {}
+_record_id_cache_lock = threading.Lock()
+
+# The retriever re-ingests both full tables (incl. customer credit) for every
+# email, so keep those reads briefly. Our own writes clear the table's entry,
+# so only edits made directly in Airtable can be up to this stale.
+AIRTABLE_CACHE_TTL_SECONDS = float(os.getenv("AIRTABLE_CACHE_TTL_SECONDS", "60"))
+_table_cache: dict[str, tuple[float, list[dict[str, Any]]]] = {}
+_table_cache_lock = threading.Lock()
+
 
 # ============================================================================
 # AIRTABLE API HELPER FUNCTIONS
 # ============================================================================
 
 
-def _fetch_all_records(table_name: str) -> list[dict[str, Any]]:
+def _fetch_all_records(
+        table_name: str,
+        formula: str | None = None,
+) -> list[dict[str, Any]]:
     """
     Fetches all records from specified Airtable table.
     Handles pagination automatically for large datasets.
 
     Args:
         table_name: Name of the Airtable table to query
+        formula: Optional Airtable formula; only matching records are returned
     Returns:
         list of record dictionaries with fields data
     """
@@ -49,8 +73,10 @@ def _fetch_all_records(table_name: str) -> list[dict[str, Any]]:
     while True:  # Loop until all pages are fetched
         # Add offset if present to get next page
         params = {"offset": offset} if offset else {}
+        if formula:
+            params["filterByFormula"] = formula
 
-        response = requests.get(
+        response = _session.get(
             url,
             headers=AIRTABLE_API_HEADER,
             params=params
@@ -68,6 +94,74 @@ def _fetch_all_records(table_name: str) -> list[dict[str, Any]]:
     return all_records
 
 
+def _fetch_all_records_cached(table_name: str) -> list[dict[str, Any]]:
+    """Same as _fetch_all_records, but reuses a result younger than the TTL.
+    Callers get a deep copy, so changing a returned record never alters the cache."""
+    with _table_cache_lock:
+        cached = _table_cache.get(table_name)
+    if cached and time.monotonic() - cached[0] < AIRTABLE_CACHE_TTL_SECONDS:
+        return copy.deepcopy(cached[1])
+
+    records = _fetch_all_records(table_name)
+    with _table_cache_lock:
+        _table_cache[table_name] = (time.monotonic(), records)
+    return copy.deepcopy(records)
+
+
+def _invalidate_table_cache(table_name: str) -> None:
+    """Drop the cached rows of a table after we write to it."""
+    with _table_cache_lock:
+        _table_cache.pop(table_name, None)
+
+
+def _get_record(table_name: str, record_id: str) -> dict[str, Any]:
+    """Fetches a single record (with its current field values) by record ID."""
+    url = f"{AIRTABLE_API_URL}/{table_name}/{record_id}"  # Record endpoint
+
+    response = _session.get(url, headers=AIRTABLE_API_HEADER)
+    response.raise_for_status()  # Raise on 4xx/5xx errors (404 if deleted)
+
+    return response.json()
+
+
+def _find_record(
+        table_name: str,
+        key_field: str,
+        key: str,
+) -> dict[str, Any] | None:
+    """
+    Returns the current record whose key_field equals key, or None.
+
+    The first lookup in a table reads every page and remembers the record ID
+    of each key. Later lookups (the same customer or SKU again, or another
+    one) fetch only that single record, so values are never stale.
+    """
+    with _record_id_cache_lock:
+        record_id = _record_id_cache.get((table_name, key_field), {}).get(key)
+
+    if record_id:
+        try:
+            record = _get_record(table_name, record_id)
+        except requests.exceptions.HTTPError:
+            record = None  # Record deleted or moved, fall back to a full scan
+        if record and record.get("fields", {}).get(key_field) == key:
+            return record
+        # Otherwise the key was edited since it was cached, so rescan
+
+    records = _fetch_all_records(table_name)
+    with _record_id_cache_lock:
+        _record_id_cache[(table_name, key_field)] = {
+            record["fields"][key_field]: record["id"]
+            for record in records
+            if key_field in record["fields"]
+        }
+
+    return next(
+        (record for record in records if record["fields"].get(key_field) == key),
+        None,
+    )
+
+
 def _create_record(
         table_name: str,
         fields: dict[str, Any]
@@ -84,13 +178,14 @@ def _create_record(
     url = f"{AIRTABLE_API_URL}/{table_name}"  # Table endpoint
     payload = {"fields": fields}  # Wrap fields in Airtable format
 
-    response = requests.post(
+    response = _session.post(
         url,
         headers=AIRTABLE_API_HEADER,
         json=payload
     )  # API call to CREATE record
 
     response.raise_for_status()  # Raise on 4xx/5xx errors
+    _invalidate_table_cache(table_name)
 
     return response.json()  # Return created record
 
@@ -113,7 +208,7 @@ def _update_record(
     url = f"{AIRTABLE_API_URL}/{table_name}/{record_id}"  # Record endpoint
     payload = {"fields": fields}  # Wrap fields in Airtable format
 
-    response = requests.patch(
+    response = _session.patch(
         url,
         headers=AIRTABLE_API_HEADER,
         json=payload
@@ -128,9 +223,39 @@ def _update_record(
             table_name, record_id, fields, response.status_code, response.text
         )
         raise
+    _invalidate_table_cache(table_name)
 
     return response.json()  # Return updated record
 
+def _update_records(
+        table_name: str,
+        updates: list[tuple[str, dict[str, Any]]],
+) -> None:
+    """
+    Updates many records with as few requests as possible.
+    Airtable accepts up to 10 records per PATCH request.
+
+    Args:
+        table_name: Name of the Airtable table containing the records
+        updates: (record ID, fields to set) pairs
+    """
+    url = f"{AIRTABLE_API_URL}/{table_name}"  # Table endpoint
+
+    try:
+        for start in range(0, len(updates), 10):
+            payload = {
+                "records": [
+                    {"id": record_id, "fields": fields}
+                    for record_id, fields in updates[start:start + 10]
+                ]
+            }
+            response = _session.patch(url, headers=AIRTABLE_API_HEADER, json=payload)
+            response.raise_for_status()  # Raise on 4xx/5xx errors
+    finally:
+        # Earlier batches may have been written even if a later one failed
+        _invalidate_table_cache(table_name)
+
+
 # ===================================================================
 # DATA SYNC FUNCTIONS (for easy Azure AI Search ingestion): fetch all
 # ===================================================================
@@ -138,13 +263,13 @@ def _update_record(
 def get_all_products() -> list[dict[str, Any]]:
     """Fetches all products for AI Search sync. Returns raw Airtable records."""
     logger.info("[FUNCTION get_all_products] Fetching all PRODUCTS from Airtable (for AI Search sync).")
-    return _fetch_all_records(AIRTABLE_PRODUCTS_TABLE)
+    return _fetch_all_records_cached(AIRTABLE_PRODUCTS_TABLE)
 
 
 def get_all_customers() -> list[dict[str, Any]]:
     """Fetches all customers for AI Search sync. Returns raw Airtable records"""
     logger.info("[FUNCTION get_all_customers] Fetching all CUSTOMERS from Airtable (for AI Search sync).")
-    return _fetch_all_records(AIRTABLE_CUSTOMERS_TABLE)
+    return _fetch_all_records_cached(AIRTABLE_CUSTOMERS_TABLE)
 
 
 # ============================================================================
@@ -186,6 +311,10 @@ def add_new_customer(
     }
 
     created = _create_record(AIRTABLE_CUSTOMERS_TABLE, fields)
+    with _record_id_cache_lock:
+        known_ids = _record_id_cache.get((AIRTABLE_CUSTOMERS_TABLE, "Customer ID"))
+        if known_ids is not None:
+            known_ids[new_id] = created["id"]
     logger.info(
         "[FUNCTION add_new_customer] Creating NEW customer with ID '{}' and record ID '{}' in Airtable.",
         new_id,
@@ -198,51 +327,44 @@ def add_new_customer(
     }
 
 
-@ai_function
-def update_inventory(
-        ordered_qty: int,
-        product_sku: str,
-) -> dict[str, Any]:
-    """Knock units off inventory for a SKU and report the new quantity."""
-    all_products = _fetch_all_records(AIRTABLE_PRODUCTS_TABLE)
-    # columns: SKU, Title, Description, UOM, Unit Price, Qty Available,
-    #          Active, Attributes JSON, Last Updated
+def update_inventory(ordered_qty_by_sku: dict[str, int]) -> dict[str, int]:
+    """Knock units off inventory for every SKU of an order and report the new quantities.
 
-    record_id: str | None = None
-    new_inventory: int = 0
+    Fetches all the order's products in one filtered request and writes the new
+    stock back in batches of 10, instead of a read + write per SKU."""
+    if not ordered_qty_by_sku:
+        return {}
 
-    for product in all_products:
-        if product["fields"].get("SKU") != product_sku:
-            continue
+    # Airtable formula strings are single-quoted, so escape quotes in SKUs
+    sku_filters = ",".join(
+        "{SKU}='" + sku.replace("'", "\\'") + "'" for sku in ordered_qty_by_sku
+    )
+    products = _fetch_all_records(AIRTABLE_PRODUCTS_TABLE, formula=f"OR({sku_filters})")
+    # columns: SKU, Title, Description, UOM, Unit Price, Qty Available,
+    #          Active, Attributes JSON, Last Updated
 
-        record_id = product["id"]  # Capture the Airtable record ID
-        current_qty = product["fields"].get("Qty Available", 0)
-        new_inventory = current_qty - ordered_qty
-        break
+    products_by_sku = {product["fields"].get("SKU"): product for product in products}
+    missing = [sku for sku in ordered_qty_by_sku if sku not in products_by_sku]
+    if missing:
+        raise ValueError(f"Products with SKUs {missing} not found in Airtable")
 
-    if not record_id:
-        raise ValueError(
-            f"Product with SKU '{product_sku}' not found in Airtable"
-        )
+    now = datetime.now().isoformat()
+    new_inventory: dict[str, int] = {}
+    updates: list[tuple[str, dict[str, Any]]] = []
 
-    fields = {
-        "Qty Available": new_inventory,
-        "Last Updated": datetime.now().isoformat(),
-    }
+    for sku, ordered_qty in ordered_qty_by_sku.items():
+        product = products_by_sku[sku]
+        new_inventory[sku] = product["fields"].get("Qty Available", 0) - ordered_qty
+        updates.append((product["id"], {"Qty Available": new_inventory[sku], "Last Updated": now}))
 
-    _update_record(AIRTABLE_PRODUCTS_TABLE, record_id, fields)
+    _update_records(AIRTABLE_PRODUCTS_TABLE, updates)
 
     logger.info(
-        "[FUNCTION update_inventory] Updating inventory for SKU '{}' to new quantity: {} in Airtable...",
-        product_sku,
+        "[FUNCTION update_inventory] Updated inventory in Airtable to new quantities: {}",
         new_inventory
     )
 
-    return {
-        "status": "updated",
-        "sku": product_sku,
-        "qty_available": new_inventory,
-    }
+    return new_inventory
 
 
 @ai_function
@@ -251,30 +373,21 @@ def update_customer_credit(
         order_amount: float,
 ) -> dict[str, Any]:
     """Increase a customer's open AR and report back the remaining credit."""
-    all_customers = _fetch_all_records(AIRTABLE_CUSTOMERS_TABLE)
+    customer = _find_record(AIRTABLE_CUSTOMERS_TABLE, "Customer ID", customer_id)
     # columns: Customer ID, Name, Email, Billing Address, Shipping Address,
     #          Credit Limit, Open AR, Currency, Status
 
-    updated_available_credit = 0.0
-    record_id: str | None = None
-    new_open_ar = 0.0  # To be calculated
-
-    for customer in all_customers:
-        if customer["fields"].get("Customer ID") != customer_id:
-            continue
-
-        record_id = customer["id"]
-        current_open_ar = customer["fields"].get("Open AR", 0.0)
-        credit_limit = customer["fields"].get("Credit Limit", 0.0)
-        new_open_ar = current_open_ar + order_amount  # Update Open AR
-        updated_available_credit = credit_limit - new_open_ar  # Calc available credit
-        break
-
-    if not record_id:
+    if not customer:
         raise ValueError(
             f"Customer with ID '{customer_id}' not found in Airtable"
         )
 
+    record_id = customer["id"]
+    current_open_ar = customer["fields"].get("Open AR", 0.0)
+    credit_limit = customer["fields"].get("Credit Limit", 0.0)
+    new_open_ar = current_open_ar + order_amount  # Update Open AR
+    updated_available_credit = credit_limit - new_open_ar  # Calc available credit
+
     fields = {
         "Open AR": new_open_ar,
     }
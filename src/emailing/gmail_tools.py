@@ -7,8 +7,13 @@ Stores credentials in `../cred/token.json` for persistent access.
 from email.message import EmailMessage
 from email.utils import parseaddr
 from pathlib import Path
+from collections.abc import Iterator
+from itertools import islice
 from typing import Any, cast
+import html
 import os
+import re
+import threading
 from loguru import logger
 
 from bs4 import BeautifulSoup  # For HTML parsing
@@ -16,6 +21,8 @@ import base64  # For decoding email body content
 
 from agent_framework import ai_function
 
+from shared.async_utils import run_in_thread
+
 from google.auth.exceptions import RefreshError  # Raised when refresh fails
 from google.auth.transport.requests import Request  # For refreshing tokens
 from google.oauth2.credentials import Credentials as OAuthCredentials  # OAuth2 credentials
@@ -35,9 +42,19 @@ CREDENTIALS_DIR = BASE_DIR / "cred"
 TOKEN_PATH = CREDENTIALS_DIR / "token.json"
 CLIENT_SECRETS_PATH = CREDENTIALS_DIR / "credentials.json"
 
+# Body cleanup patterns (compiled once): HTML detection, per-line edges, blank line runs
+_HTML_TAG_RE = re.compile(r"<[a-zA-Z/!][^>]*>")
+_LINE_EDGES_RE = re.compile(r"^[^\S\n]+|[^\S\n]+$", re.MULTILINE)  # Any whitespace but newlines (incl. nbsp)
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
 # Cached authenticated Gmail address
 _ACCOUNT_EMAIL: str | None = None
 
+# Cached Gmail API clients, one per thread: the httplib2 transport underneath
+# is not thread-safe, and the workflow calls Gmail from asyncio.to_thread workers
+_GMAIL_SERVICES = threading.local()
+_GMAIL_AUTH_LOCK = threading.Lock()  # One thread at a time refreshes/writes token.json
+
 
 def _authenticate_gmail() -> Any:
     """Return authenticated Gmail API client, refreshing tokens as needed.
@@ -110,6 +127,16 @@ def _authenticate_gmail() -> Any:
     return build("gmail", "v1", credentials=creds)
 
 
+def _get_gmail_service() -> Any:
+    """Return this thread's Gmail API client, authenticating on its first call."""
+    service = getattr(_GMAIL_SERVICES, "service", None)
+    if service is None:
+        with _GMAIL_AUTH_LOCK:
+            service = _authenticate_gmail()
+        _GMAIL_SERVICES.service = service
+    return service
+
+
 def _get_account_email(service: Any) -> str:
     """Return authenticated Gmail address (cached after first call)."""
     global _ACCOUNT_EMAIL
@@ -126,7 +153,7 @@ def _load_reply_context(message_id: str) -> tuple[Any, dict[str, str], str]:
     if not message_id:
         raise ValueError("Gmail message_id required for replies")
 
-    service = _authenticate_gmail()
+    service = _get_gmail_service()
     original = service.users().messages().get(userId="me", id=message_id, format="full").execute()
     headers = {h["name"]: h["value"] for h in original["payload"]["headers"]}
     return service, headers, original["threadId"]
@@ -160,17 +187,36 @@ def _extract_body(part: dict) -> str:
     return ""
 
 
-def fetch_unread_emails(gmail_service: Any | None = None) -> list[dict]:
-    """Fetch unread emails from Gmail inbox with full content."""
-    gmail_service = gmail_service or _authenticate_gmail()
+def _clean_body(body: str) -> str:
+    """Return readable plain text: HTML goes through BeautifulSoup, plain text
+    gets its entities decoded (as BeautifulSoup would), then its lines trimmed
+    and blank lines dropped (two regex passes)."""
+    if _HTML_TAG_RE.search(body):
+        return BeautifulSoup(body, "html.parser").get_text(separator="\n", strip=True)
+    return _BLANK_LINES_RE.sub("\n", _LINE_EDGES_RE.sub("", html.unescape(body))).strip()
 
-    messages = gmail_service.users().messages().list(
-        userId="me", q="is:unread", maxResults=1
-    ).execute().get("messages", [])
 
+def iter_unread_emails(gmail_service: Any | None = None, page_size: int = 10) -> Iterator[dict]:
+    """Yield unread emails one by one, paging through Gmail lazily.
+    A message's full content is only fetched when the caller asks for it, and
+    our own (self-sent) messages are marked read and skipped along the way."""
+    gmail_service = gmail_service or _get_gmail_service()
     account_email = _get_account_email(gmail_service)
-    emails = []
-    
+    page_token = None
+
+    while True:
+        page = gmail_service.users().messages().list(
+            userId="me", q="is:unread", maxResults=page_size, pageToken=page_token
+        ).execute()
+        yield from _iter_page_emails(gmail_service, page.get("messages", []), account_email)
+
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def _iter_page_emails(gmail_service: Any, messages: list[dict], account_email: str) -> Iterator[dict]:
+    """Fetch and yield the emails of one list() page, skipping self-sent ones."""
     for msg in messages:
         full_message = gmail_service.users().messages().get(
             userId="me", id=msg["id"], format="full"
@@ -185,31 +231,27 @@ def fetch_unread_emails(gmail_service: Any | None = None) -> list[dict]:
             ).execute()
             continue
 
-        body = _extract_body(full_message["payload"])
-        soup = BeautifulSoup(body, "html.parser")
-        body = soup.get_text(separator="\n", strip=True)
+        body = _clean_body(_extract_body(full_message["payload"]))
 
-        emails.append({
+        yield {
             "id": full_message["id"],
             "subject": headers.get("Subject", ""),
             "sender": headers.get("From", ""),
             "snippet": full_message.get("snippet", ""),
             "body": body,
-        })
-
-    return emails
+        }
 
 
-@ai_function
-def get_unread_emails() -> list[dict]:
-    """Fetch unread emails from Gmail inbox."""
-    logger.info("Fetching unread emails...")
-    return fetch_unread_emails()
+def fetch_unread_emails(gmail_service: Any | None = None, limit: int = 1) -> list[dict]:
+    """Fetch up to `limit` unread emails from Gmail inbox with full content.
+    Keeps paging past self-sent messages, so one of those at the top of the
+    inbox no longer makes the poller wait a whole interval."""
+    return list(islice(iter_unread_emails(gmail_service), limit))
 
 
 def mark_email_as_read(message_id: str) -> dict[str, str]:
     """Mark email as read."""
-    service = _authenticate_gmail()
+    service = _get_gmail_service()
     service.users().messages().modify(
         userId="me", id=message_id, body={"removeLabelIds": ["UNREAD"]}
     ).execute()
@@ -222,44 +264,56 @@ def _format_reply(customer: str, lines: list[str]) -> str:
     return "\n".join([f"Hello {customer},", "", *lines, "", "Best regards,", "PaperCo Operations"])
 
 
+# Reply bodies are built once at import; each send only fills in the placeholders
+_CONFIRMATION_TEMPLATE = _format_reply("{customer}", [
+    "Your purchase order has been confirmed.",
+    "We're processing your items and will notify you once they ship.",
+    "{invoice_line}",
+    "",
+    "Thank you for choosing PaperCo!",
+])
+
+_REJECTION_TEMPLATE = _format_reply("{customer}", [
+    "Thanks for your purchase order. Unfortunately, we cannot fulfill it at this time.",
+    "Reason: {reason}\n",
+    "If you have questions or alternatives, reply to this email.",
+])
+
+_REJECTION_HTML_TEMPLATE = (
+    "<p>Hello {customer},</p>"
+    "<p>Thanks for your purchase order. Unfortunately, we cannot fulfill it at this time.</p>"
+    "<p>Reason: {reason}</p>"
+    "<p>If you have questions or alternatives, reply to this email.</p>"
+    "<p>Best regards,<br>PaperCo Operations</p>"
+)
+
+
 @ai_function()
 def respond_confirmation_email(message_id: str, pdf_url: str | None = None) -> dict[str, str]:
     """Send order confirmation email."""
     service, headers, thread_id = _load_reply_context(message_id)
 
     customer = headers.get("From", "Valued Customer")
-    reply_body = _format_reply(customer, [
-        "Your purchase order has been confirmed.",
-        "We're processing your items and will notify you once they ship.",
-        f"Download invoice: {pdf_url}" if pdf_url else "Invoice link coming soon.",
-        "",
-        "Thank you for choosing PaperCo!",
-    ])
+    reply_body = _CONFIRMATION_TEMPLATE.format(
+        customer=customer,
+        invoice_line=f"Download invoice: {pdf_url}" if pdf_url else "Invoice link coming soon.",
+    )
 
     logger.info(f"Sending fulfillment email for {message_id}")
     return _send_reply(service, headers, thread_id, reply_body)
 
 
 @ai_function()
+@run_in_thread
 def respond_unfulfillable_email(message_id: str, reason: str) -> dict[str, str]:
     """Send rejection email when order cannot be fulfilled."""
     service, headers, thread_id = _load_reply_context(message_id)
 
     customer = headers.get("From", "Valued Customer")
-    reply_body = _format_reply(customer, [
-        "Thanks for your purchase order. Unfortunately, we cannot fulfill it at this time.",
-        f"Reason: {reason or 'Not specified'}\n",
-        "If you have questions or alternatives, reply to this email.",
-    ])
+    reply_body = _REJECTION_TEMPLATE.format(customer=customer, reason=reason or "Not specified")
 
     safe_reason = (reason or "Not specified").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-    html_body = (
-        f"<p>Hello {customer},</p>"
-        "<p>Thanks for your purchase order. Unfortunately, we cannot fulfill it at this time.</p>"
-        f"<p>Reason: {safe_reason}</p>"
-        "<p>If you have questions or alternatives, reply to this email.</p>"
-        "<p>Best regards,<br>PaperCo Operations</p>"
-    )
+    html_body = _REJECTION_HTML_TEMPLATE.format(customer=customer, reason=safe_reason)
 
     logger.info(f"Sending rejection email for {message_id}")
     return _send_reply(service, headers, thread_id, reply_body, html_body)
@@ -1,7 +1,8 @@
 """Generate invoice PDFs and upload them to Azure Blob Storage."""
 
+import hashlib
+import json
 import os
-import time
 from pathlib import Path
 from typing import Any
 from datetime import datetime
@@ -13,8 +14,8 @@ from weasyprint import HTML
 
 from agent_framework import ai_function
 from azure.core.exceptions import ResourceExistsError
-from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobServiceClient, ContentSettings
+from shared.azure_auth import CREDENTIAL
 
 load_dotenv()
 
@@ -82,6 +83,19 @@ def _html_to_pdf_bytes(html_content: str, base_path: Path) -> bytes:
     return pdf_content
 
 
+def _po_fingerprint(order_context: dict[str, Any]) -> str:
+    """Hash of the fields that identify an order (128-bit, so unrelated orders never share a blob).
+    Unlike a timestamp or the built-in hash(), the same order gives the same
+    value on every run, so a retried run reuses its invoice number and blob."""
+    identity = {
+        "c": (order_context.get("customer") or {}).get("company"),
+        "po": (order_context.get("payment") or {}).get("po_number"),
+        "i": [(item.get("description"), item.get("qty")) for item in order_context.get("items", [])],
+    }
+    encoded = json.dumps(identity, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
 def _ensure_invoice_metadata(order_context: dict[str, Any]) -> dict[str, Any]:
     """Return a shallow copy of the order context with the required invoice fields present."""
 
@@ -94,7 +108,7 @@ def _ensure_invoice_metadata(order_context: dict[str, Any]) -> dict[str, Any]:
         or context.get("invoice_number")
         or context.get("order_id")
         or context.get("po_number")
-        or f"INV-{int(time.time())}"
+        or f"INV-{_po_fingerprint(context)}"
     )
 
     # Default to today's date when issue/due dates are missing.
@@ -149,7 +163,7 @@ def generate_invoice_pdf_url(
         # Managed identity path (Container Apps / other Azure hosts)
         blob_service = BlobServiceClient(
             account_url=account_url,
-            credential=DefaultAzureCredential(),
+            credential=CREDENTIAL,
         )
     elif connection_string:
         # Local development fallback when you only have a connection string
@@ -160,7 +174,8 @@ def generate_invoice_pdf_url(
             "or AZURE_STORAGE_CONNECTION_STRING for local development."
         )
 
-    blob_name = f"{template_path.stem}-{int(time.time())}.pdf"
+    # Named after the invoice number, so a retried run overwrites instead of duplicating
+    blob_name = f"{template_path.stem}-{order_context_with_invoice['invoice']['number']}.pdf"
     container_client = blob_service.get_container_client(container_name)
 
     try:
@@ -14,45 +14,51 @@ from slack_sdk.errors import SlackApiError
 from loguru import logger
 
 
+# Slack caps message length, and approvers only need the first lines to decide
+MAX_ITEMS_IN_SUMMARY = 25
+
+
+# Helper function to format one line item for the Slack approval message
+def _format_item_line(item: dict[str, Any]) -> str:
+    # Use the ACTUAL field names the agent outputs (read once, no copy of the item)
+    qty = item.get("ordered_qty")
+    name = item.get("product_name")
+    price = item.get("unit_price")
+    subtotal = item.get("subtotal")
+
+    # Validate all fields are present before formatting
+    if qty is not None and name is not None and price is not None and subtotal is not None:
+        return f"- {qty}x {name} @ EUR {price:.2f} → EUR {subtotal:.2f}"
+
+    # Log which format keys we tried and what we found
+    logger.error("[SLACK] ERROR: Item has wrong schema! Keys: {}", list(item))
+    logger.error("[SLACK] Expected: ordered_qty, product_name, unit_price, subtotal")
+    logger.error("[SLACK] Got: qty={}, name={}, price={}, subtotal={}", qty, name, price, subtotal)
+    return "- ERROR: Item schema mismatch"
+
+
 def _format_order_summary(retrieved_po: dict[str, Any]) -> str:
     """Build the Slack approval message from enriched PO data.
     
     IMPORTANT: Uses the ACTUAL field names output by the agent:
         product_name, ordered_qty, unit_price, subtotal
-    """
-    po_data = {k: v for k, v in retrieved_po.items()}
-    
-    customer_name = po_data.get("customer_name", "Unknown Customer")
-    order_total = po_data.get("order_total", 0.0)
-    items = po_data.get("items", [])
 
-    item_lines: list[str] = []
-    
-    for item in items:
-        item_data = {key: value for key, value in item.items()}
-        
-        # Use the ACTUAL field names the agent outputs
-        qty = item_data.get("ordered_qty")
-        name = item_data.get("product_name")
-        price = item_data.get("unit_price")
-        subtotal = item_data.get("subtotal")
-        
-        # Validate all fields are present before formatting
-        if qty is not None and name is not None and price is not None and subtotal is not None:
-            item_lines.append(
-                f"- {qty}x {name} @ EUR {price:.2f} → EUR {subtotal:.2f}"
-            )
-        else:
-            # Log which format keys we tried and what we found
-            logger.error("[SLACK] ERROR: Item has wrong schema! Keys: {}", list(item_data.keys()))
-            logger.error("[SLACK] Expected: ordered_qty, product_name, unit_price, subtotal")
-            logger.error("[SLACK] Got: qty={}, name={}, price={}, subtotal={}", qty, name, price, subtotal)
-            item_lines.append("- ERROR: Item schema mismatch")
+    Only the first MAX_ITEMS_IN_SUMMARY items are formatted; the rest are
+    summarised as a count (the total still covers every item).
+    """
+    customer_name = retrieved_po.get("customer_name", "Unknown Customer")
+    order_total = retrieved_po.get("order_total", 0.0)
+    items = retrieved_po.get("items", [])
 
-    if not item_lines:
-        item_lines.append("- No line items provided")
+    # Join straight from a generator, no intermediate list of lines
+    items_block = "\n".join(
+        _format_item_line(item) for item in items[:MAX_ITEMS_IN_SUMMARY]
+    )
 
-    items_block = "\n".join(item_lines)
+    if not items_block:
+        items_block = "- No line items provided"
+    elif len(items) > MAX_ITEMS_IN_SUMMARY:
+        items_block += f"\n- ... and {len(items) - MAX_ITEMS_IN_SUMMARY} more items"
 
     return (
         f"📦 *Order Awaiting Approval*\n\n"
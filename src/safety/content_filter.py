@@ -1,15 +1,22 @@
 import os
+from functools import cache
 from dotenv import load_dotenv
 from loguru import logger
 
 from azure.ai.contentsafety import ContentSafetyClient
 from azure.ai.contentsafety.models import AnalyzeTextOptions
-from azure.identity import DefaultAzureCredential
 from agent_framework import ai_function
+from shared.azure_auth import CREDENTIAL
 
 load_dotenv()
 
 
+# Helper function to reuse one client (and its cached token) per endpoint
+@cache
+def _get_client(endpoint: str) -> ContentSafetyClient:
+    return ContentSafetyClient(endpoint=endpoint, credential=CREDENTIAL)
+
+
 @ai_function
 def check_email_content_safety(email_body: str, threshold: int = 4) -> dict:
     """
@@ -33,11 +40,7 @@ def check_email_content_safety(email_body: str, threshold: int = 4) -> dict:
     if not endpoint:
         raise ValueError("CONTENT_SAFETY_ENDPOINT env variable must be set!")
     
-    # Create Content Safety client instance
-    client = ContentSafetyClient(
-        endpoint=endpoint,
-        credential=DefaultAzureCredential()
-    )
+    client = _get_client(endpoint)
     
     # Analyze text, which checks all 4 categories automatically:
     # Hate, Self-Harm, Sexual, Violence
@@ -6,13 +6,12 @@ before allowing order fulfillment. Uses a pass-through pattern - accepts
 AgentExecutorResponse, validates it, attaches metadata, and passes it through.
 """
 import os
-import json
 from dotenv import load_dotenv
 from loguru import logger
 
 from azure.ai.evaluation import GroundednessEvaluator
-from azure.identity import DefaultAzureCredential
 from agent_framework import executor, AgentExecutorResponse, WorkflowContext
+from shared.azure_auth import CREDENTIAL
 
 load_dotenv()
 
@@ -51,7 +50,7 @@ async def check_agent_groundedness(
     agent_response = [
         {
             "role": "assistant",
-            "content": json.dumps(retrieved_po.model_dump()),
+            "content": retrieved_po.model_dump_json(),  # pydantic-core serializer, no dict round-trip
         }
     ]
     
@@ -66,7 +65,7 @@ async def check_agent_groundedness(
             "azure_deployment": "gpt-4.1",
         },
         threshold=3,
-        credential=DefaultAzureCredential(),
+        credential=CREDENTIAL,
     )
     
     context = "\n\n".join(retrieval_evidence)
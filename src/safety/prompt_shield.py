@@ -3,8 +3,8 @@ import os
 import requests
 from loguru import logger
 
-from azure.identity import DefaultAzureCredential
 from agent_framework import ai_function
+from shared.azure_auth import get_bearer_token
 
 load_dotenv()
 
@@ -51,11 +51,10 @@ def check_email_prompt_injection(email_body: str) -> dict:
 
     # Construct the full URL for the Prompt Shield API endpoint
     url = f"{endpoint}/contentsafety/text:shieldPrompt?api-version=2024-09-01"
-    credential = DefaultAzureCredential()
-    token = credential.get_token("https://cognitiveservices.azure.com/.default")
+    token = get_bearer_token("https://cognitiveservices.azure.com/.default")
     
     headers = {  # the headers for the request
-        "Authorization": f"Bearer {token.token}",  # the bearer token for authentication
+        "Authorization": f"Bearer {token}",  # the bearer token for authentication
         "Content-Type": "application/json"  # `application/json` means request body is JSON
     }
     
@@ -0,0 +1,22 @@
+"""Helpers for running blocking code from the async workflow."""
+
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+def run_in_thread(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """Turn a blocking function into an async one that runs in a worker thread.
+
+    Agent tools that do network I/O (Airtable, Azure Search, Slack, Gmail) are
+    plain sync functions. Called directly, they block the event loop, so
+    several tool calls from one agent turn run one after another. Wrapped
+    with this (under @ai_function), they run in threads and overlap instead.
+    functools.wraps keeps the name, docstring and signature for the tool schema.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,32 @@
+"""One Azure credential shared by the whole process."""
+
+import threading
+import time
+
+from azure.core.credentials import AccessToken
+from azure.identity import DefaultAzureCredential
+
+# Building a credential is cheap, but each new one starts with an empty token
+# cache. When it falls through to the Azure CLI, every first token costs an
+# `az account get-access-token` subprocess, so create it once and share it.
+CREDENTIAL = DefaultAzureCredential()
+
+# Refresh a little before expiry so a request never goes out with a stale token
+_REFRESH_MARGIN_SECONDS = 300
+
+_tokens: dict[str, AccessToken] = {}
+_tokens_lock = threading.Lock()
+
+
+def get_bearer_token(scope: str) -> str:
+    """Return a bearer token for the scope, fetching a new one only near expiry.
+
+    Only needed for raw HTTP calls. Azure SDK clients given CREDENTIAL
+    already cache their own tokens.
+    """
+    with _tokens_lock:
+        token = _tokens.get(scope)
+        if token is None or token.expires_on - time.time() < _REFRESH_MARGIN_SECONDS:
+            token = CREDENTIAL.get_token(scope)
+            _tokens[scope] = token
+        return token.token
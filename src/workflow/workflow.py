@@ -1,5 +1,7 @@
 import asyncio
+import json
 import os
+import re
 import sys
 from pathlib import Path
 
@@ -29,7 +31,7 @@ from agents.middleware_tools import clear_evidence  # noqa: E402
 from safety.groundedness_check import check_agent_groundedness  # noqa: E402
 from aisearch.azure_search_tools import destroy_indexes # executor to delete indexes after use  # noqa: E402
 from emailing.gmail_tools import (  # noqa: E402
-    # below is NOT the AI function (get_unread_emails is, which is used by the agent)!
+    # Plain helpers (not AI functions): the poller fetches each email and hands it to the classifier
     fetch_unread_emails,
     mark_email_as_read
 )
@@ -151,14 +153,32 @@ workflow = create_workflow()
 
 POLL_INTERVAL_SECONDS = int(os.getenv("GMAIL_POLL_INTERVAL_SECONDS", "60"))
 
+# Cheap pre-filter so obvious bulk mail never reaches the LLM classifier
+_NON_PO_RE = re.compile(r"unsubscribe|newsletter|no-?reply@|digest|notification", re.IGNORECASE)
+_PO_HINT_RE = re.compile(r"purchase order|\bPO\b|order|quote|RFQ", re.IGNORECASE)
+
+
+def is_obvious_non_po(email: dict) -> bool:
+    """True for bulk/automated mail (by sender or subject) with no sign of an order anywhere.
+    Errs on the side of sending mail to the classifier."""
+    header = f"{email.get('sender', '')} {email.get('subject', '')}"
+    if not _NON_PO_RE.search(header):
+        return False
+    return not _PO_HINT_RE.search(f"{header} {email.get('body', '')}")
+
 
 @logger.catch
 async def run_till_mail_read():  # async cuz we'll need to await workflow.run()
-    """Run the workflow repeatedly until no unread Gmail messages remain."""
+    """Run the workflow repeatedly until no unread Gmail messages remain.
+    
+    Emails are processed one at a time: each fetched email is passed to the
+    classifier in the kickoff prompt, and evidence + search indexes are shared per run.
+    Blocking Gmail calls run in a worker thread so they don't stall the event loop.
+    """
     processed = 0
     
     while True:
-        unread_messages = fetch_unread_emails()
+        unread_messages = await asyncio.to_thread(fetch_unread_emails)
         if not unread_messages:
             logger.info(
                 "No unread emails detected | total_processed={} | sleeping {}s",
@@ -177,9 +197,22 @@ async def run_till_mail_read():  # async cuz we'll need to await workflow.run()
             subject_preview or "[no subject]",
         )
     
+        if is_obvious_non_po(current):
+            # Same outcome as a classifier "not a PO" run, without the LLM call
+            logger.info("Skipping obvious non-PO email | email_id={}", current.get("id"))
+            await asyncio.to_thread(mark_email_as_read, current["id"])
+            processed += 1
+            continue
+
+        # Hand the already-fetched email to the classifier, so it doesn't fetch
+        # it from Gmail a second time (and always classifies this exact email)
+        email_json = json.dumps(
+            {key: current.get(key, "") for key in ("id", "subject", "sender", "body")},
+            ensure_ascii=False,
+        )
         kickoff_prompt = (
-            "Process the latest unread Gmail message. Classify it, "
-            "then continue through parsing, resolution, and routing."
+            "Classify this unread Gmail message, then continue through "
+            f"parsing, resolution, and routing.\n\nEMAIL:\n{email_json}"
         )
 
         # Create a fresh workflow instance for this run (to avoid state leakage)
@@ -194,7 +227,7 @@ async def run_till_mail_read():  # async cuz we'll need to await workflow.run()
         logger.info("Workflow completed for email_id={}", current.get('id'))
 
         # After processing, mark the email as read
-        mark_result = mark_email_as_read(current["id"])
+        mark_result = await asyncio.to_thread(mark_email_as_read, current["id"])
 
         # Clear evidence to prevent leaking between workflow runs
         clear_evidence()